@@ -0,0 +1,26 @@
+
+import numpy as np
+import math
+
+
+def emptyArray(length, dtype=np.float64):
+    """
+    Uninitialized array of the given length, rounded up to a
+    whole number of elements: lengths derived from a frame
+    rate, which may be fractional (59.94 Hz), need not be
+    integers.
+    """
+    return np.empty(int(math.ceil(length)), dtype=dtype)
+
+
+def growArray(array, size, chunk_size):
+    """
+    Longer copy of an array that grows by chunks: the first
+    size elements are kept, followed by chunk_size
+    uninitialized ones beyond the current length.
+    """
+
+    grown = emptyArray(len(array) + chunk_size, dtype=array.dtype)
+    grown[:size] = array[:size]
+
+    return grown
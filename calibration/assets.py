@@ -0,0 +1,126 @@
+
+from collections import OrderedDict
+
+
+class AssetCache:
+    """
+    Process-wide cache of images, fonts and rendered texts.
+    PyGame is imported on first use, so that modules needing
+    the cache do not pay for it at import.
+
+    Image files are read once. Images are converted to the
+    display format once a display mode is set, and optionally
+    pre-scaled. Each kind of asset
+    is kept in a least-recently-used cache of bounded size.
+    """
+
+    def __init__(self, max_images=32, max_fonts=8, max_texts=128) -> None:
+
+        self._files = _LRUCache(max_images)
+        self._images = _LRUCache(max_images)
+        self._fonts = _LRUCache(max_fonts)
+        self._texts = _LRUCache(max_texts)
+
+    def image(self, path, size=None):
+        """
+        Image loaded from path, scaled to size (width, height)
+        if given, in the display format if a display mode is
+        set.
+        """
+
+        import pygame
+
+        display = pygame.display.get_surface()
+        key = (
+            path, tuple(size) if size is not None else None,
+            None if display is None else
+            (display.get_bitsize(), display.get_masks())
+        )
+
+        return self._images.fetch(
+            key, lambda: self._loadImage(path, size, display)
+        )
+
+    def font(self, name, size):
+        """
+        System font of the given name and size.
+        """
+
+        import pygame
+
+        return self._fonts.fetch(
+            (name, size), lambda: pygame.font.SysFont(name, size)
+        )
+
+    def text(self, text, name, size, color):
+        """
+        Text rendered (antialiased) with the given system font
+        and color.
+        """
+
+        key = (text, name, size, tuple(color))
+
+        return self._texts.fetch(
+            key, lambda: self.font(name, size).render(text, True, color)
+        )
+
+    def clear(self):
+        """
+        Empty all caches.
+        """
+
+        self._files.clear()
+        self._images.clear()
+        self._fonts.clear()
+        self._texts.clear()
+
+        return
+
+    def _loadImage(self, path, size, display):
+        """
+        Scale and convert an image, read from disk only once.
+        """
+
+        import pygame
+
+        surf = self._files.fetch(path, lambda: pygame.image.load(path))
+
+        if size is not None:
+            surf = pygame.transform.smoothscale(surf, size)
+
+        if display is not None:
+            surf = surf.convert_alpha()
+
+        return surf
+
+
+class _LRUCache(OrderedDict):
+    """
+    Mapping evicting its least recently used item beyond
+    max_size items.
+    """
+
+    def __init__(self, max_size) -> None:
+        super().__init__()
+
+        self.max_size = max_size
+
+    def fetch(self, key, factory):
+        """
+        Cached value of key, created with factory if missing.
+        """
+
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+
+        value = factory()
+        self[key] = value
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+
+        return value
+
+
+# Shared cache
+ASSETS = AssetCache()
@@ -0,0 +1,133 @@
+
+from .calibrations import TernaryCalibration
+from .calibrations import BinaryCalibration
+from .storage import saveSession
+from .config import Config, CONFIG
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import argparse
+import os
+
+
+CALIBRATIONS = {
+    'binary': BinaryCalibration,
+    'ternary': TernaryCalibration
+}
+
+
+def generateSessions(
+    n_sessions, calibration_type, output,
+    workers=None, seed=None, config=CONFIG
+):
+    """
+    Generate n_sessions headless calibration sessions in a
+    process pool, and save them in the binary session format
+    under the output directory.
+
+    Each session gets its own random generator, spawned from
+    the seed, so that a batch is reproducible whatever the
+    number of workers. All sessions use the given config,
+    which is sent along to the workers.
+    """
+
+    os.makedirs(output, exist_ok=True)
+
+    seeds = np.random.SeedSequence(seed).spawn(n_sessions)
+    paths = [
+        os.path.join(output, f'{i:06d}-{CALIBRATIONS[calibration_type].type}')
+        for i in range(n_sessions)
+    ]
+
+    workers = workers or os.cpu_count()
+    chunk_size = max(1, n_sessions // (4*workers))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(
+            _generateSession,
+            [calibration_type]*n_sessions, seeds, paths,
+            [config]*n_sessions,
+            chunksize=chunk_size
+        ):
+            pass
+
+    return paths
+
+
+def _generateSession(calibration_type, seed, path, config):
+    """
+    Worker: generate and save a single session.
+    """
+
+    calibration = CALIBRATIONS[calibration_type](
+        None, headless=True, rng=np.random.default_rng(seed), config=config
+    )
+
+    saveSession(
+        path,
+        calibration.getSamples(),
+        calibration.getStimulusMovements().toArray(),
+        config.toDict() | {
+            'type': calibration.type,
+            'fps': calibration.fps,
+            'seed': {
+                'entropy': str(seed.entropy),
+                'spawn_key': list(seed.spawn_key)
+            }
+        },
+        encoding=config.export.encoding
+    )
+
+    return
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description='Generate synthetic calibration sessions.'
+    )
+    parser.add_argument(
+        '-n', '--sessions', type=int, required=True,
+        help='number of sessions to generate'
+    )
+    parser.add_argument(
+        '-t', '--type', choices=CALIBRATIONS, default='ternary',
+        help='calibration type'
+    )
+    parser.add_argument(
+        '-o', '--output', default='results/batch',
+        help='output directory'
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, default=None,
+        help='number of worker processes (all CPUs by default)'
+    )
+    parser.add_argument(
+        '-s', '--seed', type=int, default=None,
+        help='seed of the batch'
+    )
+    parser.add_argument(
+        '-c', '--config', nargs='+', default=[None],
+        help='config files (config.yml of the package by default); '
+             'with several, each gets its own batch in a subdirectory '
+             'of the output directory named after it'
+    )
+    args = parser.parse_args()
+
+    for path in args.config:
+
+        output = args.output
+        if len(args.config) > 1:
+            name = os.path.splitext(os.path.basename(path))[0]
+            output = os.path.join(output, name)
+
+        generateSessions(
+            args.sessions, args.type, output,
+            workers=args.workers, seed=args.seed,
+            config=Config.load(path)
+        )
+
+
+if __name__ == '__main__':
+
+    main()
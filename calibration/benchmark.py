@@ -0,0 +1,318 @@
+
+import os
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+from .calibrations import Calibration
+from .calibrations import TernaryCalibration
+from .calibrations import BinaryCalibration
+from .sampling import sampleDestinations
+from .clock import VirtualClock
+from .target import Target
+from .main import Experiment
+from .config import CONFIG
+
+from datetime import datetime
+import numpy as np
+import argparse
+import subprocess
+import platform
+import tempfile
+import pygame
+import json
+import time
+import sys
+
+
+SESSION_LENGTHS = [1, 2, 5]  # in min
+WINDOW_SIZES = [(1280, 720), (1920, 1080), (2560, 1440)]
+
+# Startup budget: cumulative import time of the entry point
+# modules, in ms. main opens a window right away, hence
+# imports PyGame (about half of its budget), which headless
+# modules only import when a session loads the target image
+STARTUP_BUDGET = {
+    'main': 400,
+    'batch': 300,
+    'simulator': 150
+}
+
+
+def timeit(function, repeat):
+    """
+    Run function repeat times and return timing statistics,
+    in s, along with the last result.
+    """
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter()-start)
+
+    return {
+        'best': min(times),
+        'mean': float(np.mean(times)),
+        'repeat': repeat
+    }, result
+
+
+def benchQueueGeneration(repeat):
+    """
+    Movement queue generation, for both calibration types
+    and several session lengths.
+    """
+
+    results = []
+    for calibration_class in (BinaryCalibration, TernaryCalibration):
+        for t_max in SESSION_LENGTHS:
+
+            # Calibration that is not run
+            calibration = calibration_class.__new__(calibration_class)
+            Calibration.__init__(calibration, None, headless=True)
+            calibration.target = Target()
+
+            stats, queue = timeit(
+                lambda: calibration._generateMovementQueue(t_max), repeat
+            )
+            results.append({
+                'type': calibration_class.type,
+                'session_length': t_max,
+                'n_movements': len(queue),
+                **stats
+            })
+
+    return results
+
+
+def benchPursuitSampling(repeat):
+    """
+    Pursuit generation, one at a time and by batch.
+    """
+
+    target = Target()
+    start_pos = target._getPos()
+    n = 1000
+
+    stats, _ = timeit(
+        lambda: [target._generatePursuit(start_pos) for _ in range(n)],
+        repeat
+    )
+    results = [{'mode': 'single', 'n_pursuits': n, **stats}]
+
+    start_pos = np.random.random((n, 2)) * CONFIG.window_size
+    stats, _ = timeit(
+        lambda: sampleDestinations(
+            start_pos, target.x_max, target.y_max,
+            CONFIG.pursuit.min_duration,
+            CONFIG.pursuit.max_duration,
+            CONFIG.pursuit.min_vel,
+            CONFIG.pursuit.max_vel
+        ),
+        repeat
+    )
+    results.append({'mode': 'batch', 'n_pursuits': n, **stats})
+
+    return results
+
+
+def benchFrameLoop(repeat):
+    """
+    Per-frame cost of the session loop (drawing, events,
+    sample capture), on a dummy display with a clock that
+    never sleeps, for several window sizes.
+    """
+
+    results = []
+
+    pygame.init()
+    try:
+        for width, height in WINDOW_SIZES:
+
+            config = CONFIG.replace({
+                'global': {'window_width': width, 'window_height': height}
+            })
+            screen = pygame.display.set_mode(config.window_size)
+
+            stats, calibration = timeit(
+                lambda: TernaryCalibration(
+                    screen, clock=VirtualClock(), config=config
+                ),
+                repeat
+            )
+            n_frames = len(calibration.getSamples()['t'])
+            results.append({
+                'window_size': [width, height],
+                'n_frames': n_frames,
+                'per_frame': stats['best'] / n_frames,
+                **stats
+            })
+
+    finally:
+        pygame.quit()
+
+    return results
+
+
+def benchExport(repeat):
+    """
+    Data generation, pixel to degree conversion and export,
+    for several session lengths.
+    """
+
+    results = []
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.mkdir(os.path.join(directory, 'results'))
+        try:
+            for t_max in SESSION_LENGTHS:
+
+                # Experiment without user interface
+                config = CONFIG.replace({'global': {'exp_duration': t_max}})
+                experiment = Experiment.__new__(Experiment)
+                experiment.config = config
+                experiment.pixel_size = config.pixel_size
+                experiment.viewing_distance = config.monitor.viewing_distance
+                experiment.calibration = TernaryCalibration(
+                    None, headless=True, config=config
+                )
+                experiment.filename = experiment._getFilename(
+                    TernaryCalibration
+                )
+
+                generate, _ = timeit(experiment._generateData, repeat)
+                convert, _ = timeit(
+                    lambda: experiment._pixToDeg(experiment.data['x']), repeat
+                )
+
+                # Results are exported to the temporary directory
+                os.chdir(directory)
+                export, _ = timeit(experiment._exportData, repeat)
+                os.chdir(cwd)
+
+                results.append({
+                    'session_length': t_max,
+                    'n_samples': len(experiment.data['t']),
+                    'generate_data': generate,
+                    'pix_to_deg': convert,
+                    'export': export
+                })
+
+        finally:
+            os.chdir(cwd)
+
+    return results
+
+
+def benchStartup(repeat):
+    """
+    Import time of the entry point modules, each in a fresh
+    interpreter (python -X importtime), against the startup
+    budget, along with their heaviest imported packages.
+    """
+
+    results = []
+    for module, budget in STARTUP_BUDGET.items():
+
+        # Best run
+        name = f'{__package__}.{module}'
+        times = min(
+            (_importTimes(name) for _ in range(repeat)),
+            key=lambda times: times[name]
+        )
+        import_time = times.pop(name)
+        heaviest = sorted(
+            (name for name in times
+             if '.' not in name and name != __package__),
+            key=times.get, reverse=True
+        )[:5]
+
+        results.append({
+            'module': module,
+            'import_time': import_time,
+            'budget': budget,
+            'within_budget': import_time <= budget,
+            'heaviest': {name: times[name] for name in heaviest},
+            'repeat': repeat
+        })
+
+    return results
+
+
+def _importTimes(module):
+    """
+    Cumulative import time of module and of everything it
+    imports, in ms, as reported by python -X importtime.
+    """
+
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True
+    )
+
+    # Lines read 'import time: self | cumulative | name', in us
+    times = {}
+    for line in process.stderr.splitlines():
+        fields = line.removeprefix('import time:').split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1]) / 1000
+
+    return times
+
+
+BENCHMARKS = {
+    'startup': benchStartup,
+    'queue_generation': benchQueueGeneration,
+    'pursuit_sampling': benchPursuitSampling,
+    'frame_loop': benchFrameLoop,
+    'export': benchExport
+}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description='Run the calibration benchmarks.'
+    )
+    parser.add_argument(
+        '-o', '--output', default=None,
+        help='JSON results file (benchmarks/<date>.json by default)'
+    )
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=3,
+        help='number of runs of each benchmark'
+    )
+    parser.add_argument(
+        '-b', '--benchmarks', nargs='+', choices=BENCHMARKS,
+        default=list(BENCHMARKS), help='benchmarks to run'
+    )
+    args = parser.parse_args()
+
+    np.random.seed(0)
+
+    now = datetime.now()
+    report = {
+        'date': now.isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'results': {}
+    }
+    for name in args.benchmarks:
+        print(f'Running {name}...')
+        report['results'][name] = BENCHMARKS[name](args.repeat)
+
+    output = args.output
+    if output is None:
+        os.makedirs('benchmarks', exist_ok=True)
+        output = f'benchmarks/{now.strftime("%Y_%m_%d-%H_%M_%S")}.json'
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Results saved to {output}')
+
+
+if __name__ == '__main__':
+
+    main()
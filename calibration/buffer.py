@@ -0,0 +1,144 @@
+
+from .storage import COLUMNS, loadSession
+from .arrays import emptyArray, growArray
+
+import math
+
+
+class SampleBuffer:
+    """
+    Preallocated storage for the stimulus samples of a
+    session.
+
+    Samples are written in place into typed NumPy arrays,
+    which grow by chunks when the initial capacity turns out
+    to be too small.
+
+    With a sink (see storage.SessionWriter), the buffer is
+    handed over to the sink whenever it is full and then
+    reused, so that memory use stays constant. Once closed,
+    the buffer exposes the samples memory-mapped from disk.
+    """
+
+    def __init__(self, capacity, chunk_size=1000, sink=None) -> None:
+
+        self.size = 0
+        self.chunk_size = chunk_size
+        self.sink = sink
+
+        # Number of samples already handed over to the sink
+        self.offset = 0
+
+        # Sample arrays
+        self.t = emptyArray(capacity)
+        self.x = emptyArray(capacity)
+        self.y = emptyArray(capacity)
+        self.delay = emptyArray(capacity)
+
+    def __len__(self):
+        """
+        Number of samples recorded, including those handed
+        over to the sink.
+        """
+        return self.offset + self.size
+
+    @classmethod
+    def fromQueue(cls, movement_queue, fps, sink=None):
+        """
+        Buffer sized for playing a movement queue at the
+        given frame rate.
+
+        Each movement may add a frame because of rounding.
+        Buffers streaming to a sink only hold 10 s of
+        samples. Sizes are whole numbers of samples, even at
+        fractional frame rates.
+        """
+
+        chunk_size = int(math.ceil(10*fps))
+
+        if sink is not None:
+            return cls(chunk_size, sink=sink)
+
+        capacity = int(math.ceil(movement_queue.duration()*fps)) \
+            + 2*len(movement_queue)
+
+        return cls(capacity, chunk_size=chunk_size)
+
+    def append(self, t, x, y, delay=0):
+        """
+        Store a sample.
+        """
+
+        if self.size == len(self.t):
+            if self.sink is None:
+                self._grow()
+            else:
+                self.flush()
+
+        self.t[self.size] = t
+        self.x[self.size] = x
+        self.y[self.size] = y
+        self.delay[self.size] = delay
+        self.size += 1
+
+        return
+
+    def flush(self):
+        """
+        Hand the buffered samples over to the sink.
+        """
+
+        self.sink.writeSamples(
+            self.t[:self.size], self.x[:self.size], self.y[:self.size],
+            self.delay[:self.size]
+        )
+        self.offset += self.size
+        self.size = 0
+
+        return
+
+    def close(self):
+        """
+        Flush the remaining samples and close the sink. The
+        buffer then maps the session files written by the sink.
+        """
+
+        if self.sink is None:
+            return
+
+        self.flush()
+        self.sink.close()
+
+        session = loadSession(self.sink.path)
+        for column in COLUMNS:
+            setattr(self, column, session[column])
+        self.size = len(self.t)
+        self.offset = 0
+        self.sink = None
+
+        return
+
+    def view(self, start=0, stop=None):
+        """
+        Return the samples between start and stop as views
+        into the buffer (no copy).
+        """
+
+        if stop is None:
+            stop = self.size
+
+        return {
+            column: getattr(self, column)[start:stop] for column in COLUMNS
+        }
+
+    def _grow(self):
+        """
+        Extend the buffer by one chunk.
+        """
+
+        for name in COLUMNS:
+            setattr(self, name, growArray(
+                getattr(self, name), self.size, self.chunk_size
+            ))
+
+        return
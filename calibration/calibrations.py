@@ -1,60 +1,382 @@
 
-from __init__ import CONFIG
-from target import Target
+from .config import CONFIG
+from .instrumentation import DRAW, FLIP, EVENTS, CAPTURE
+from .buffer import SampleBuffer
+from .clock import VirtualClock
+from .movement import MovementQueue
+from .schedule import FrameSchedule
+from .presentation import DEFAULT_FPS
+from .target import Target
+from .timing import FrameTimer
 
 from itertools import cycle
-import pygame
+import numpy as np
+import math
+import time
+import os
+import gc
 
 
 class Calibration:
 
-    def __init__(self, screen) -> None:
+    def __init__(
+        self, screen, headless=False, sink=None, rng=np.random,
+        tracker=None, clock=None, probe=None, realtime=False, config=CONFIG,
+        fps=None, vsync=False
+    ) -> None:
 
         # Exit condition
         self.early_break = False
 
         # General parameters
         self.screen = screen
+        self.headless = headless
+        self.sink = sink
+        self.rng = rng
+        self.tracker = tracker
+        self.clock = clock
+        self.probe = probe
+        self.realtime = realtime
+        self.config = config
         self.running = True
-        self.fps = 100
 
-        # Movement parameter
+        # Frame rate, and whether flips wait for the display
+        # refresh (see presentation.openWindow)
+        if fps is None:
+            fps = config.display.refresh_rate or DEFAULT_FPS
+        self.fps = fps
+        self.vsync = vsync
+
+        # Planned presentation time of the current frame, in ms
+        # on the session clock
         self.time = 0
 
+        # Target area on the previous frame
+        self.last_rect = None
+
+        # PyGame module, bound once the session runs with a
+        # window (see _run)
+        self.pygame = None
+
     def getStimulusMovements(self):
         """
         Return stimulus movements.
         """
         return self.movement_queue
 
+    def getSamples(self):
+        """
+        Return the stimulus samples recorded during the
+        session, as views into the sample buffer.
+        """
+        return self.samples.view()
+
+    def getGaze(self):
+        """
+        Return the gaze samples received from the eye-tracker
+        during the session, with timestamps on the session
+        clock.
+        """
+        return self.tracker.getSamples(origin_ns=self.flip_timer.marks[0])
+
+    def getFlipTimes(self):
+        """
+        Return the time of each flip of the session, in ms on
+        the session clock, which starts on the first flip.
+        """
+        return (
+            self.flip_timer.marks[:self.flip_timer.size]
+            - self.flip_timer.marks[0]
+        ) / 1e6
+
+    def getFrameTimingReport(self):
+        """
+        Return the frame timing quality summary of the
+        session.
+
+        It includes the presentation mode and the timing of
+        the flips. In real-time mode, it also compares the
+        frame time spread of the first frames of the session
+        with that of the same frames, played before isolating
+        the loop, and gives the number of garbage collections
+        that ran during those frames.
+        """
+
+        report = self.frame_timer.report()
+        report['presentation'] = {
+            'vsync': self.vsync,
+            'flips': self.flip_timer.report(),
+            **self._presentationDelays()
+        }
+
+        if self.realtime:
+            baseline = self.baseline_timer.frameTimes()
+            isolated = self.frame_timer.frameTimes()[:len(baseline)]
+            measured = len(baseline) and len(isolated)
+            report['realtime'] = {
+                'priority_raised': self.priority_raised,
+                'baseline_std_frame_time':
+                    float(baseline.std()) if measured else None,
+                'baseline_worst_frame_time':
+                    float(baseline.max()) if measured else None,
+                'isolated_std_frame_time':
+                    float(isolated.std()) if measured else None,
+                'baseline_gc_collections': self.baseline_gc_collections,
+                'spread_improvement': (
+                    float(baseline.std() / isolated.std())
+                    if measured and isolated.std() else None
+                )
+            }
+
+        return report
+
+    def _presentationDelays(self):
+        """
+        Summary of the delays between the actual and planned
+        presentation times (in ms), and number of scheduled
+        frames skipped because they were late.
+        """
+
+        samples = self.getSamples()
+        if not len(samples['t']):
+            return {}
+
+        period = 1000 / self.fps
+        skipped = np.round(np.diff(samples['t']) / period) - 1
+
+        return {
+            'mean_delay': float(np.mean(samples['delay'])),
+            'worst_delay': float(np.max(np.abs(samples['delay']))),
+            'skipped_frames': int(skipped.sum())
+        }
+
     def _run(self):
         """
         Launch experiment.
         """
 
         # Initialize target
-        self.target = Target()
+        self.target = Target(rng=self.rng, config=self.config)
 
-        # Generate an event queue
+        # Generate an event queue, and plan its frames
         self.movement_queue = self._generateMovementQueue()
+        self.schedule = FrameSchedule(self.movement_queue, self.fps)
+
+        # Preallocate the sample buffer, possibly streaming
+        # samples to disk
+        self.samples = SampleBuffer.fromQueue(
+            self.movement_queue, self.fps, sink=self.sink
+        )
+
+        # PyGame is only needed with a window, and imported
+        # once rather than on every frame
+        if not self.headless:
+            import pygame
+            self.pygame = pygame
+
+        # Game clock. Headless sessions use a virtual clock
+        # that advances one frame per tick without sleeping
+        if self.clock is None:
+            if self.headless:
+                self.clock = VirtualClock(
+                    refresh_rate=self.fps if self.vsync else None
+                )
+            else:
+                self.clock = self.pygame.time.Clock()
+        now = getattr(self.clock, 'time_ns', time.perf_counter_ns)
+
+        # High-resolution frame timing
+        self.frame_timer = FrameTimer(
+            self.fps, capacity=len(self.samples.t), now=now
+        )
+
+        # Time of each flip
+        self.flip_timer = FrameTimer(
+            self.fps, capacity=len(self.samples.t), now=now
+        )
+
+        try:
+
+            # Isolate the frame loop
+            if self.realtime:
+                self._enterRealtime()
+
+            # Gaze samples are received in the background
+            if self.tracker is not None:
+                self.tracker.start()
+
+            # Frame stage instrumentation
+            if self.probe is not None:
+                self.probe.start()
+
+            # Frames are timed from now on, and paced from the
+            # first flip
+            if self.vsync and not self.headless:
+                self.clock.tick()
+            self.frame_timer.mark()
+
+            self._play()
+
+        except RuntimeWarning:
+            self.early_break = True
+
+        # Once all movements are done, or whatever interrupted
+        # the session, restore the process state, stop the
+        # background work and finish streamed files
+        finally:
+            self.running = False
 
-        # Game clock
-        self.clock = pygame.time.Clock()
+            if self.realtime:
+                self._exitRealtime()
 
-        while self.running:
+            if self.tracker is not None:
+                self.tracker.stop()
+            if self.probe is not None:
+                self.probe.stop()
 
-            for movement in self.movement_queue:
+            self.samples.close()
 
-                # Get appropriate target behavior
-                try:
-                    self._updateTargetBehavior(movement)
+        # Expose the samples of each movement
+        self._bindSamples()
 
-                except RuntimeWarning:
-                    self.early_break = True
-                    break
+        return
 
-            # Once all movements are done, exit
-            self.running = False
+    def _enterRealtime(self):
+        """
+        Isolate the frame loop from garbage collection and
+        other processes.
+
+        The first frames of the schedule are first played and
+        measured as they would be run normally, as a baseline.
+        Then the objects allocated so far are collected and
+        frozen, the garbage collector is disabled and the
+        process priority raised, where allowed.
+        """
+
+        # Nothing to restore if the baseline is interrupted
+        self.priority_raised = False
+        self.baseline_gc_collections = 0
+
+        # Baseline frames, moving the target along the schedule
+        # as the session does (samples are not captured)
+        n_frames = min(
+            round(self.config.realtime.baseline_duration*self.fps),
+            len(self.schedule)
+        )
+        x = self.schedule.x.tolist()
+        y = self.schedule.y.tolist()
+        self.baseline_timer = FrameTimer(
+            self.fps, capacity=n_frames+1, now=self.frame_timer.now
+        )
+        collections = _gcCollections()
+        self.baseline_timer.mark()
+        for frame in range(n_frames):
+            self.target.updatePos(x[frame], y[frame])
+            self._draw()
+            self._pollEvents()
+            self._wait(frame+1)
+            self.baseline_timer.mark()
+        self.baseline_gc_collections = _gcCollections() - collections
+
+        # Garbage collection
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+
+        # Process priority
+        try:
+            os.nice(self.config.realtime.niceness)
+            self.priority_raised = True
+        except (AttributeError, OSError):
+            self.priority_raised = False
+
+        # Flips of the baseline are not part of the session
+        self.flip_timer.size = 0
+
+        return
+
+    def _exitRealtime(self):
+        """
+        Restore garbage collection and process priority,
+        whether or not the loop was isolated yet.
+        """
+
+        if self.priority_raised:
+            os.nice(-self.config.realtime.niceness)
+
+        gc.enable()
+        gc.unfreeze()
+
+        return
+
+    def _bindSamples(self):
+        """
+        Give movements access to their samples, as views into
+        the sample buffer once it no longer grows.
+        """
+
+        self.movement_queue.bindSamples(self.samples.view())
+
+        return
+
+    def _tick(self, frame):
+        """
+        Wait for the frame to play after frame (see
+        _nextFrame), and return it.
+        """
+
+        frame = self._nextFrame(frame)
+        self._wait(frame)
+        self.frame_timer.mark()
+        if self.probe is not None:
+            self.probe.endFrame()
+
+        return frame
+
+    def _wait(self, frame):
+        """
+        Wait for the planned time of a frame, unless the
+        flip already waited for the display refresh.
+        """
+
+        if self.vsync:
+            self.clock.tick()
+            return
+
+        if isinstance(self.clock, VirtualClock):
+            self.clock.tick(self.fps)
+            return
+
+        deadline = self.flip_timer.marks[0] + frame*1e9/self.fps
+        now = self.frame_timer.now
+        while now() < deadline:
+            pass
+
+        return
+
+    def _captureSample(self):
+        """
+        Store the planned presentation time of the frame, the
+        centered target position and the delay between the
+        actual and the planned presentation times. Nothing is
+        presented in headless mode, where the delay is 0.
+        """
+
+        if self.headless:
+            delay = 0
+        else:
+            flips = self.flip_timer
+            delay = (flips.marks[flips.size-1] - flips.marks[0]) / 1e6 \
+                - self.time
+
+        self.samples.append(
+            self.time,
+            self.target.x + self.target.x_offset,
+            self.target.y_offset - self.target.y,
+            delay
+        )
+        if self.probe is not None:
+            self.probe.mark(CAPTURE)
 
         return
 
@@ -62,6 +384,7 @@ class Calibration:
         """
         Exit handler.
         """
+        pygame = self.pygame
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 self.running = False
@@ -70,172 +393,198 @@ class Calibration:
             self.running = False
             raise RuntimeWarning
 
-    def _draw(self):
-        """
-        Draw function.
+    def _pollEvents(self):
         """
+        Process the PyGame event queue.
 
-        # Draw background
-        self.screen.fill(CONFIG['global']['bg_color'])
+        There is no window, hence no events, in headless mode.
+        """
 
-        # Draw target
-        self.screen.blit(self.target.surf, self.target.rect)
+        if not self.headless:
+            for event in self.pygame.event.get():
+                self._catchExit(event)
 
-        # Display
-        pygame.display.flip()
+        if self.probe is not None:
+            self.probe.mark(EVENTS)
 
         return
 
-    def _updateTargetBehavior(self, movement):
+    def _draw(self):
         """
-        Deal with movement types.
+        Draw function.
+
+        Only the previous and current target areas are
+        redrawn and pushed to the display, and nothing is
+        done while the target does not move (unless flips are
+        locked to the display refresh). The time of each flip
+        is recorded.
         """
 
-        updates = {
-            'fixation': self._handleFixation,
-            'saccade': self._handleSaccade,
-            'pursuit': self._handlePursuit
-        }
+        rects = self._blit()
+        if self.probe is not None:
+            self.probe.mark(DRAW)
 
-        # Update target position
-        updates[movement.type](movement)
+        self._present(rects)
+        self.flip_timer.mark()
+        if self.probe is not None:
+            self.probe.mark(FLIP)
 
         return
 
-    def _handleFixation(self, movement):
+    def _blit(self):
         """
-        Deal with fixation movement.
+        Draw the target on the window surface.
 
-        A fixation does not move so nothing to do
-        here really.
+        Returns the areas to push to the display: None when
+        there is nothing to update, or an empty list when the
+        whole window must be.
         """
 
-        # Initialize output variables
-        timestamps = []
-        positions = {
-            'x': [],
-            'y': []
-        }
-
-        start_time = self.time
-        duration = movement.duration*1000
-        # print(
-        #     f'Fixation: t={duration/1000}s, amplitude={movement.amplitude}, start={movement.start_pos}, end={movement.end_pos}, vel={movement.velocity}'
-        # )
-        while self.time < start_time + duration:
+        # Nothing to draw in headless mode
+        if self.headless:
+            return None
 
-            # Draw
-            self._draw()
-
-            # Catch exit
-            for event in pygame.event.get():
-                self._catchExit(event)
-
-            # Get timestamp
-            timestamps.append(self.time)
+        # First frame: draw the whole window
+        if self.last_rect is None:
+            self.screen.fill(self.config.bg_color)
+            self.screen.blit(self.target.surf, self.target.rect)
+            rects = []
 
-            # Get position
-            target_pos = self.target._getCenteredPos()
-            positions['x'].append(target_pos[0])
-            positions['y'].append(target_pos[1])
+        # Still target: nothing to update
+        elif self.target.rect == self.last_rect:
+            return None
 
-            # Update clock
-            self.clock.tick(self.fps)
-
-            # Increment time
-            self.time += self.clock.get_time()
+        # Moving target: erase its previous position and
+        # draw it at the new one
+        else:
+            self.screen.fill(self.config.bg_color, self.last_rect)
+            self.screen.blit(self.target.surf, self.target.rect)
+            rects = [self.last_rect, self.target.rect]
 
-        # Populate movement info
-        movement.addTimestamps(timestamps)
-        movement.addPositions(positions)
+        self.last_rect = self.target.rect.copy()
 
-        return
+        return rects
 
-    def _handleSaccade(self, movement):
+    def _present(self, rects):
         """
-        Deal with saccade movement.
+        Push the drawn areas to the display.
 
-        At half of the saccade's duration, actually
-        move the saccade towards its destination.
+        With vsync, the whole window is flipped every frame,
+        since flips pace the frames.
         """
 
-        # Initialize output variables
-        timestamps = []
-        positions = {
-            'x': [],
-            'y': []
-        }
+        # Nothing is presented in headless mode
+        if self.headless:
+            return
 
-        start_time = self.time
-        duration = movement.duration*1000
-        # print(
-        #     f'Saccade: t={duration/1000}s, amplitude={movement.amplitude}, start={movement.start_pos}, end={movement.end_pos}, vel={movement.velocity}'
-        # )
-        while self.time < start_time + duration:
+        pygame = self.pygame
 
-            # Draw
-            self._draw()
-
-            # Catch exit
-            for event in pygame.event.get():
-                self._catchExit(event)
-
-            # Get timestamp
-            timestamps.append(self.time)
+        if self.vsync:
+            pygame.display.flip()
+            return
 
-            # Get position
-            target_pos = self.target._getCenteredPos()
-            positions['x'].append(target_pos[0])
-            positions['y'].append(target_pos[1])
+        if rects is None:
+            return
 
-            # Move the target towards its destination
-            if self.time >= start_time + duration/2:
-                self.target.updatePos(*movement.end_pos)
+        if rects:
+            pygame.display.update(rects)
+        else:
+            pygame.display.flip()
 
-            # Update clock
-            self.clock.tick(self.fps)
+        return
 
-            # Increment time
-            self.time += self.clock.get_time()
+    def _play(self):
+        """
+        Play the frame schedule, from the first flip. Late
+        frames are skipped (see _nextFrame).
+        """
 
-        # Populate movement info
-        movement.addTimestamps(timestamps)
-        movement.addPositions(positions)
+        # Frame steps and scheduled positions, looked up once
+        updatePos = self.target.updatePos
+        draw = self._draw
+        pollEvents = self._pollEvents
+        captureSample = self._captureSample
+        tick = self._tick
+        x = self.schedule.x.tolist()
+        y = self.schedule.y.tolist()
+        boundaries = self.schedule.boundaries.tolist()
+        period = 1000 / self.fps
+
+        frame = 0
+        for i, movement in enumerate(self.movement_queue):
+
+            movement.onset = boundaries[i]*period
+            movement.sample_offset = len(self.samples)
+            if self.probe is not None:
+                self.probe.startMovement()
+
+            try:
+                while frame < boundaries[i+1]:
+                    self.time = frame*period
+                    updatePos(x[frame], y[frame])
+                    draw()
+                    pollEvents()
+                    captureSample()
+                    frame = tick(frame)
+
+            finally:
+                movement.sample_count = \
+                    len(self.samples) - movement.sample_offset
+                if self.sink is not None:
+                    self.sink.writeMovement(movement.toRecord())
+                if self.probe is not None:
+                    self.probe.endMovement(movement)
 
         return
 
-    def _handlePursuit(self, movement):
+    def _nextFrame(self, frame):
         """
-        Default function that will be overwitten if 
-        necessary.
+        Index of the frame to play after frame: the one planned
+        for the time of the next flip, if frame + 1 is late.
         """
-        return
+
+        elapsed = (self.frame_timer.now() - self.flip_timer.marks[0]) \
+            * self.fps / 1e9
+
+        if self.vsync:
+            planned = math.ceil(elapsed - 0.01)
+        else:
+            planned = math.ceil(elapsed - 0.5)
+
+        return max(frame+1, planned)
+
+
+def _gcCollections():
+    """
+    Number of garbage collections so far, all generations.
+    """
+    return sum(stats['collections'] for stats in gc.get_stats())
 
 
 class BinaryCalibration(Calibration):
 
-    def __init__(self, screen) -> None:
-        super().__init__(screen)
+    type = 'binary_calibration'
 
-        self.type = 'binary_calibration'
+    def __init__(self, screen, **kwargs) -> None:
+        super().__init__(screen, **kwargs)
 
         self._run()
 
-    def _generateMovementQueue(
-        self,
-        t_max=CONFIG['global']['exp_duration']
-    ):
+    def _generateMovementQueue(self, t_max=None):
         """
         Generate stimulus movements until the total 
         duration reaches the maxmimum experiment time
-        (3 minutes by default).
+        (exp_duration of the config by default).
         """
 
+        if t_max is None:
+            t_max = self.config.exp_duration
+
         # Start with a fixation
         start_pos = self.target._getPos()
-        movement_queue = [
+        movement_queue = MovementQueue([
             self.target._generateFixation(start_pos)
-        ]
+        ])
         total_duration = movement_queue[-1].duration
 
         # Cycle over saccade and fixation movements until
@@ -264,28 +613,28 @@ class BinaryCalibration(Calibration):
 
 class TernaryCalibration(Calibration):
 
-    def __init__(self, screen) -> None:
-        super().__init__(screen)
+    type = 'ternary_calibration'
 
-        self.type = 'ternary_calibration'
+    def __init__(self, screen, **kwargs) -> None:
+        super().__init__(screen, **kwargs)
 
         self._run()
 
-    def _generateMovementQueue(
-        self,
-        t_max=CONFIG['global']['exp_duration']
-    ):
+    def _generateMovementQueue(self, t_max=None):
         """
         Generate stimulus movements until the total 
         duration reaches the maxmimum experiment time
-        (3 minutes by default).
+        (exp_duration of the config by default).
         """
 
+        if t_max is None:
+            t_max = self.config.exp_duration
+
         # Start with a fixation
         start_pos = self.target._getPos()
-        movement_queue = [
+        movement_queue = MovementQueue([
             self.target._generateFixation(start_pos)
-        ]
+        ])
         total_duration = movement_queue[-1].duration
 
         # Cycle over saccade and fixation movements until
@@ -312,65 +661,3 @@ class TernaryCalibration(Calibration):
             total_duration += movement.duration
 
         return movement_queue
-
-    def _handlePursuit(self, movement):
-        """
-        Deal with pursuit movement.
-        """
-
-        # Initialize output variables
-        timestamps = []
-        positions = {
-            'x': [],
-            'y': []
-        }
-
-        start_time = self.time
-        duration = movement.duration*1000
-        # print(
-        #     f'Pursuit: t={duration/1000}s, amplitude={movement.amplitude}, start={movement.start_pos}, end={movement.end_pos}, vel={movement.velocity}'
-        # )
-        while self.time < start_time + duration:
-
-            # Draw
-            self._draw()
-
-            # Catch exit
-            for event in pygame.event.get():
-                self._catchExit(event)
-
-            # Get timestamp
-            timestamps.append(self.time)
-
-            # Get position
-            target_pos = self.target._getCenteredPos()
-            positions['x'].append(target_pos[0])
-            positions['y'].append(target_pos[1])
-
-            # Move the target towards its destination
-            deltaT = self.clock.get_time()/1000
-            x_increment = deltaT * movement.velocity[0]
-            y_increment = deltaT * movement.velocity[1]
-            self.target.updatePos(
-                self.target.x + x_increment,
-                self.target.y + y_increment
-            )
-
-            # Update clock
-            self.clock.tick(self.fps)
-
-            # Increment time
-            self.time += self.clock.get_time()
-
-        # Final movement
-        self.target.updatePos(*movement.end_pos)
-        timestamps.append(self.time)
-        target_pos = self.target._getCenteredPos()
-        positions['x'].append(target_pos[0])
-        positions['y'].append(target_pos[1])
-
-        # Populate movement info
-        movement.addTimestamps(timestamps)
-        movement.addPositions(positions)
-
-        return
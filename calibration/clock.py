@@ -0,0 +1,88 @@
+
+class VirtualClock:
+    """
+    Drop-in replacement for pygame.time.Clock that never
+    sleeps.
+
+    Each call to tick() advances a simulated time by exactly
+    one frame, so that a headless session runs as fast as
+    the CPU allows while producing the same timestamps as
+    an ideal real-time session.
+
+    With a refresh rate, ticks without frame rate advance the
+    time by one refresh period, as flips locked to the display
+    refresh (vsync) would.
+    """
+
+    def __init__(self, refresh_rate=None) -> None:
+
+        self.refresh_rate = refresh_rate
+
+        # Simulated time since the clock was created, in ms
+        self.elapsed = 0
+        self.frame_time = 0
+        self.elapsed_ns = 0
+
+        # Ticks at the current frame rate, since the time it
+        # was set, so that the simulated time does not drift
+        self._framerate = 0
+        self._start = 0
+        self._n_ticks = 0
+
+    def tick(self, framerate=0):
+        """
+        Advance the clock by one frame and return the
+        frame duration in ms. Frame rates that do not divide
+        1000 give fractional frame durations: the simulated
+        time is computed from the number of frames, not
+        accumulated, so that it does not drift.
+        """
+
+        if not framerate and self.refresh_rate:
+            framerate = self.refresh_rate
+
+        if framerate != self._framerate:
+            self._framerate = framerate
+            self._start = self.elapsed
+            self._n_ticks = 0
+
+        if framerate > 0:
+            self._n_ticks += 1
+            self.frame_time = 1000 / framerate
+            self.elapsed = self._start + self._n_ticks*1000/framerate
+        else:
+            self.frame_time = 0
+        self.elapsed_ns = round(self.elapsed * 1e6)
+
+        return self.frame_time
+
+    # A virtual clock is exact, busy looping makes no difference
+    tick_busy_loop = tick
+
+    def get_time(self):
+        """
+        Duration of the previous frame, in ms.
+        """
+        return self.frame_time
+
+    def get_rawtime(self):
+        """
+        A virtual clock never sleeps, so the raw time is
+        the frame time.
+        """
+        return self.frame_time
+
+    def time_ns(self):
+        """
+        Simulated time, in ns, usable in place of
+        time.perf_counter_ns.
+        """
+        return self.elapsed_ns
+
+    def get_fps(self):
+        """
+        Frame rate implied by the previous tick.
+        """
+        if self.frame_time == 0:
+            return 0.0
+        return 1000 / self.frame_time
@@ -0,0 +1,280 @@
+
+from types import NoneType
+import yaml
+import os
+
+# Hide PyGame welcome message. Modules using PyGame import
+# the config first
+os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
+
+
+NUMBER = (int, float)
+
+# Expected config sections, keys and value types
+SCHEMA = {
+    'global': {
+        'window_width': int,
+        'window_height': int,
+        'bg_color': list,
+        'exp_duration': NUMBER
+    },
+    'display': {
+        'refresh_rate': (int, float, NoneType),
+        'vsync': bool
+    },
+    'target': {
+        'image': str,
+        'size': (list, NoneType)
+    },
+    'monitor': {
+        'horizontal_pixel_resolution': int,
+        'monitor_width': NUMBER,
+        'viewing_distance': NUMBER
+    },
+    'fixation': {
+        'min_duration': NUMBER,
+        'max_duration': NUMBER
+    },
+    'saccade': {
+        'min_duration': NUMBER,
+        'max_duration': NUMBER
+    },
+    'pursuit': {
+        'min_duration': NUMBER,
+        'max_duration': NUMBER,
+        'min_vel': NUMBER,
+        'max_vel': NUMBER
+    },
+    'export': {
+        'stream': bool,
+        'resample_rate': (int, float, NoneType),
+        'encoding': str
+    },
+    'simulator': {
+        'saccade_latency': list,
+        'pursuit_latency': list,
+        'pursuit_gain': NUMBER,
+        'catch_up_threshold': NUMBER,
+        'blink_rate': NUMBER,
+        'blink_duration': list,
+        'noise': NUMBER
+    },
+    'tracker': {
+        'enabled': bool,
+        'host': str,
+        'port': int
+    },
+    'realtime': {
+        'enabled': bool,
+        'baseline_duration': NUMBER,
+        'niceness': int
+    }
+}
+
+# Values that must be strictly positive
+POSITIVE = [
+    ('global', 'window_width'), ('global', 'window_height'),
+    ('global', 'exp_duration'), ('display', 'refresh_rate'),
+    ('monitor', 'horizontal_pixel_resolution'),
+    ('monitor', 'monitor_width'), ('monitor', 'viewing_distance'),
+    ('fixation', 'min_duration'), ('saccade', 'min_duration'),
+    ('pursuit', 'min_duration'), ('pursuit', 'max_vel')
+]
+
+# Values restricted to a set of choices
+CHOICES = {
+    ('export', 'encoding'): ('columns', 'events')
+}
+
+
+class Section:
+    """
+    Immutable config section, whose values are read as
+    attributes (or items, as in the config file).
+    """
+
+    __slots__ = ()
+
+    def __init__(self, values) -> None:
+
+        for key in self.__slots__:
+            object.__setattr__(self, key, _freeze(values[key]))
+
+    def __setattr__(self, key, value):
+        raise AttributeError('Config sections are immutable.')
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def toDict(self):
+        """
+        Section values as a plain dict.
+        """
+        return {key: _thaw(getattr(self, key)) for key in self.__slots__}
+
+
+# One slotted section class per config section
+SECTIONS = {
+    name: type(f'{name.capitalize()}Section', (Section,), {
+        '__slots__': tuple(keys)
+    })
+    for name, keys in SCHEMA.items()
+}
+
+
+class Config:
+    """
+    Validated, immutable experiment configuration.
+
+    Sections are read as attributes (config.pursuit.min_vel)
+    except for the global one, whose values are attributes of
+    the config itself (config.window_width). Items can still
+    be read as in the config file (config['global']['bg_color']).
+    Constants derived from the values are computed once.
+    """
+
+    __slots__ = tuple(
+        name for name in SCHEMA if name != 'global'
+    ) + tuple(SCHEMA['global']) + (
+        '_global', 'path', 'window_size', 'pixel_size', 'target_image'
+    )
+
+    def __init__(self, values, path=None) -> None:
+
+        _validate(values)
+
+        def set(key, value):
+            object.__setattr__(self, key, value)
+
+        set('path', path)
+
+        # Sections
+        for name, section_class in SECTIONS.items():
+            section = section_class(values[name])
+            if name == 'global':
+                set('_global', section)
+                for key in section.__slots__:
+                    set(key, getattr(section, key))
+            else:
+                set(name, section)
+
+        # Derived constants
+        set('window_size', (self.window_width, self.window_height))
+        set('pixel_size',
+            self.monitor.monitor_width
+            / self.monitor.horizontal_pixel_resolution)
+        directory = os.path.dirname(path) if path is not None else ''
+        set('target_image', os.path.join(directory, self.target.image))
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Load the config from a YAML file, config.yml in the
+        package directory by default.
+        """
+
+        if path is None:
+            path = os.path.join(os.path.dirname(__file__), 'config.yml')
+
+        with open(path, 'r') as cfg:
+            return cls(yaml.safe_load(cfg), path=os.path.abspath(path))
+
+    def __setattr__(self, key, value):
+        raise AttributeError('Config is immutable, use replace().')
+
+    def __getitem__(self, name):
+        if name == 'global':
+            return self._global
+        if name not in SCHEMA:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __reduce__(self):
+        return (Config, (self.toDict(), self.path))
+
+    def items(self):
+        """
+        Sections as (name, dict) pairs, as in the config file.
+        """
+        return self.toDict().items()
+
+    def toDict(self):
+        """
+        Config values as plain nested dicts.
+        """
+        return {name: self[name].toDict() for name in SCHEMA}
+
+    def replace(self, overrides):
+        """
+        Return a new config with some values replaced, given
+        as nested dicts ({'global': {'window_width': 1920}}).
+        """
+
+        values = self.toDict()
+        for name, section in overrides.items():
+            values[name].update(section)
+
+        return Config(values, path=self.path)
+
+
+def _validate(values):
+    """
+    Check that values match the config schema.
+    """
+
+    for name, keys in SCHEMA.items():
+
+        if not isinstance(values.get(name), dict):
+            raise ValueError(f'Missing config section: {name}.')
+
+        unknown = set(values[name]) - set(keys)
+        if unknown:
+            raise ValueError(
+                f'Unknown config keys in {name}: {", ".join(sorted(unknown))}.'
+            )
+
+        for key, types in keys.items():
+            if key not in values[name]:
+                raise ValueError(f'Missing config value: {name}.{key}.')
+            value = values[name][key]
+            if not isinstance(value, types) \
+                    or (isinstance(value, bool) and types is not bool):
+                raise ValueError(f'Invalid config value: {name}.{key}.')
+            if (name, key) in CHOICES and value not in CHOICES[name, key]:
+                raise ValueError(f'Invalid config value: {name}.{key}.')
+
+        # Bounds
+        for key in keys:
+            if key.startswith('min_') and f'max_{key[4:]}' in keys:
+                if values[name][key] > values[name][f'max_{key[4:]}']:
+                    raise ValueError(
+                        f'Config {name}.{key} exceeds {name}.max_{key[4:]}.'
+                    )
+
+    for name, key in POSITIVE:
+        if values[name][key] is not None and values[name][key] <= 0:
+            raise ValueError(f'Config {name}.{key} must be positive.')
+
+    return
+
+
+def _freeze(value):
+    """
+    Immutable copy of a config value.
+    """
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    """
+    Plain copy of a frozen config value.
+    """
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+# Default config, loaded once from the package directory
+CONFIG = Config.load()
@@ -0,0 +1,239 @@
+
+from .movement import MOVEMENT_TYPES, linearPosition
+from .schedule import nominalOnsets
+
+import numpy as np
+
+
+# Movement type code of pursuits
+PURSUIT = MOVEMENT_TYPES.index('pursuit')
+
+
+def encodeTrace(data, movements, fps):
+    """
+    Event-based encoding of the samples of a session
+    (t, x, y and delay columns, as saved by saveSession)
+    played at fps, given its movement table.
+
+    Only the changes are stored:
+        - t, as the session frame of the first sample of
+        each run of consecutive frames (all of t if the
+        samples are not on the frame grid);
+        - x and y, as the position of each sample where it
+        changes, outside of pursuits;
+        - pursuits, as the index of their movement in the
+        table along with the centering offset of their
+        positions, which are recomputed from the movement
+        parameters;
+        - delay, as the value of each sample where it
+        changes when that is smallest (headless sessions),
+        otherwise as the actual minus the planned
+        presentation time of each sample, in whole ns on
+        32 bits (all of delay if that is not exact).
+
+    The encoding is lossless: decodeTrace gives back the
+    exact same columns. Pursuits whose positions cannot be
+    recomputed exactly are stored as position changes.
+
+    Returns a dict of arrays.
+    """
+
+    t, x, y, delay = (
+        np.asarray(data[column], dtype=np.float64)
+        for column in ('t', 'x', 'y', 'delay')
+    )
+    n_samples = len(t)
+
+    events = {
+        'n_samples': np.int64(n_samples),
+        'fps': np.float64(fps)
+    }
+
+    # Runs of consecutive frames
+    frames = np.rint(t / (1000/fps)).astype(np.int64)
+    if np.array_equal(frames * (1000/fps), t):
+        starts = _changes(np.diff(frames) != 1, n_samples)
+        events['frame_runs'] = np.stack((starts, frames[starts]), axis=1)
+    else:
+        events['t'] = t
+        frames = None
+
+    # Pursuits whose positions are recomputed exactly
+    movements = np.asarray(movements)
+    pursuit = np.zeros(n_samples, dtype=bool)
+    indices, offsets = [], []
+    if frames is not None:
+        onsets = nominalOnsets(movements['duration'])
+        for i in np.flatnonzero(
+            (movements['type'] == PURSUIT) & (movements['sample_count'] > 0)
+        ):
+            samples, px, py = _pursuitPositions(
+                movements[i:i+1], onsets[i:i+1], frames, fps
+            )
+
+            # Target offsets are multiples of half a pixel
+            offset = (
+                np.round(2*(x[samples][0] - px[0])) / 2,
+                np.round(2*(y[samples][0] + py[0])) / 2
+            )
+            if np.array_equal(px + offset[0], x[samples]) \
+                    and np.array_equal(offset[1] - py, y[samples]):
+                pursuit[samples] = True
+                indices.append(i)
+                offsets.append(offset)
+
+    events['pursuits'] = np.array(indices, dtype=np.int64)
+    events['pursuit_offsets'] = np.array(offsets, dtype=np.float64) \
+        .reshape(-1, 2)
+
+    # Position changes, including after each pursuit
+    changes = _changes(
+        (x[1:] != x[:-1]) | (y[1:] != y[:-1]) | pursuit[:-1], n_samples
+    )
+    changes = changes[(changes == 0) | ~pursuit[changes]]
+    events['changes'] = changes
+    events['change_x'] = x[changes]
+    events['change_y'] = y[changes]
+
+    # Delays, as their changes or on every sample, whichever
+    # is smallest (16 bytes per change, 4 or 8 per sample)
+    changes = _changes(delay[1:] != delay[:-1], n_samples)
+    delay_ns = _delayOffsets(t, delay)
+    if 4*len(changes) <= (n_samples if delay_ns is not None
+                          else 2*n_samples):
+        events['delay_changes'] = changes
+        events['delay_values'] = delay[changes]
+    elif delay_ns is not None:
+        events['delay_ns'] = delay_ns
+    else:
+        events['delay'] = delay
+
+    return events
+
+
+def decodeTrace(events, movements):
+    """
+    Reconstruct the t, x, y and delay columns of a session
+    from its event-based encoding (see encodeTrace) and its
+    movement table.
+    """
+
+    n_samples = int(events['n_samples'])
+    fps = float(events['fps'])
+
+    # Frames and planned times
+    frames = None
+    if 't' in events:
+        t = np.array(events['t'], dtype=np.float64)
+    else:
+        runs = events['frame_runs']
+        frames = np.arange(n_samples) \
+            + _hold(runs[:, 0], runs[:, 1] - runs[:, 0], n_samples)
+        t = frames * (1000/fps)
+
+    # Positions held between changes...
+    x = _hold(events['changes'], events['change_x'], n_samples)
+    y = _hold(events['changes'], events['change_y'], n_samples)
+
+    # ... and recomputed during pursuits
+    pursuits = events['pursuits']
+    if len(pursuits):
+        movements = np.asarray(movements)
+        samples, px, py = _pursuitPositions(
+            movements[pursuits],
+            nominalOnsets(movements['duration'])[pursuits],
+            frames, fps
+        )
+        offsets = np.repeat(
+            events['pursuit_offsets'],
+            movements['sample_count'][pursuits], axis=0
+        )
+        x[samples] = px + offsets[:, 0]
+        y[samples] = offsets[:, 1] - py
+
+    # Delays, held between changes or on every sample
+    if 'delay_ns' in events:
+        delay = _delays(t, events['delay_ns'])
+    elif 'delay' in events:
+        delay = np.array(events['delay'], dtype=np.float64)
+    else:
+        delay = _hold(
+            events['delay_changes'], events['delay_values'], n_samples
+        )
+
+    return {'t': t, 'x': x, 'y': y, 'delay': delay}
+
+
+def _delayOffsets(t, delay):
+    """
+    Actual minus planned presentation time of each sample,
+    in whole ns, as an int32 array from which _delays gives
+    back delay exactly, or None if there is none.
+
+    Delays are recorded from flip times in whole ns since
+    the first flip, minus the planned time t (in ms).
+    """
+
+    planned_ns = np.rint(t * 1e6)
+    offsets = np.rint((delay + t) * 1e6) - planned_ns
+
+    if len(offsets) and np.abs(offsets).max() > np.iinfo(np.int32).max:
+        return None
+    offsets = offsets.astype(np.int32)
+    if not np.array_equal(_delays(t, offsets), delay):
+        return None
+
+    return offsets
+
+
+def _delays(t, offsets):
+    """
+    Delays of samples planned at t (in ms), given their
+    presentation time offsets in ns (see _delayOffsets).
+    """
+    return (np.rint(t * 1e6) + offsets) / 1e6 - t
+
+
+def _changes(changed, n_samples):
+    """
+    Indices of the samples starting a run, among n_samples
+    samples, given whether each sample but the first differs
+    from the previous one.
+    """
+    return np.flatnonzero(np.concatenate(([n_samples > 0], changed)))
+
+
+def _hold(starts, values, n_samples):
+    """
+    Values of n_samples samples, each run holding its value
+    from its first sample (given by starts) on.
+    """
+    return np.repeat(values, np.diff(starts, append=n_samples))
+
+
+def _pursuitPositions(pursuits, onsets, frames, fps):
+    """
+    Target positions (top-left screen coordinates) of the
+    samples of pursuit records, given the nominal onset of
+    each pursuit (in s) and the frame of every session sample,
+    evaluated as in their FrameSchedule.
+
+    Returns the indices of the samples and their x and y
+    positions.
+    """
+
+    counts = pursuits['sample_count']
+    starts = np.cumsum(counts) - counts
+
+    def repeat(values):
+        return np.repeat(values, counts, axis=0)
+
+    samples = np.arange(counts.sum()) \
+        + repeat(pursuits['sample_offset'] - starts)
+    duration = repeat(pursuits['duration'])
+    t = np.clip(frames[samples]/fps - repeat(onsets), 0, duration)
+
+    return (samples,) + linearPosition(
+        repeat(pursuits['start_pos']), repeat(pursuits['end_pos']),
+        repeat(pursuits['velocity']), duration, t
+    )
@@ -1,15 +1,15 @@
 
-from __init__ import CONFIG
+from .config import CONFIG
+from .assets import ASSETS
 
 import pygame
 
 
 class Button:
 
-    def __init__(self, x, y):
+    def __init__(self, x, y, config=CONFIG):
         self.surf = pygame.Surface(
-            (CONFIG['global']['window_width']/4,
-             CONFIG['global']['window_height']/7)
+            (config.window_width/4, config.window_height/7)
         )
         self.surf.fill((255, 255, 255))
         self.rect = self.surf.get_rect()
@@ -23,8 +23,7 @@ class Button:
 
 class Text:
 
-    def __init__(self, text, button):
+    def __init__(self, text, button, config=CONFIG):
 
-        self.surf = pygame.font.SysFont(
-            'Lato', 25).render(text, True, CONFIG['global']['bg_color'])
+        self.surf = ASSETS.text(text, 'Lato', 25, config.bg_color)
         self.rect = self.surf.get_rect(center=button.rect.center)
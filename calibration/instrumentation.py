@@ -0,0 +1,200 @@
+
+from collections import deque
+import numpy as np
+import json
+import time
+import sys
+import gc
+
+
+# Frame stages, in the order they run
+STAGES = ('draw', 'flip', 'events', 'capture', 'tick')
+DRAW, FLIP, EVENTS, CAPTURE, TICK = range(len(STAGES))
+
+
+class Probe:
+    """
+    Hot-path instrumentation of the session loop.
+
+    The duration of each frame stage (see STAGES) is measured
+    with time.perf_counter_ns, and garbage collections and
+    memory block allocations are accounted per movement.
+    Measurements go to a sink (RingBufferSink or FileSink).
+    """
+
+    def __init__(self, sink) -> None:
+
+        self.sink = sink
+        self.stages = np.zeros(len(STAGES), dtype=np.int64)
+        self._last = 0
+
+        # Garbage collections of the current movement
+        self._gc_start = 0
+        self._gc_count = 0
+        self._gc_time = 0
+        self._blocks = 0
+
+    def start(self):
+        """
+        Start measuring, before the first frame.
+        """
+
+        gc.callbacks.append(self._onGarbageCollection)
+        self._last = time.perf_counter_ns()
+
+        return
+
+    def stop(self):
+        """
+        Stop measuring, after the last frame (or whenever the
+        session is interrupted), and close the sink.
+        """
+
+        if self._onGarbageCollection in gc.callbacks:
+            gc.callbacks.remove(self._onGarbageCollection)
+        self.sink.close()
+
+        return
+
+    def mark(self, stage):
+        """
+        End a frame stage.
+        """
+
+        now = time.perf_counter_ns()
+        self.stages[stage] = now - self._last
+        self._last = now
+
+        return
+
+    def endFrame(self):
+        """
+        End the tick stage, and thus the frame.
+        """
+
+        self.mark(TICK)
+        self.sink.writeFrame(self.stages)
+        self.stages[:] = 0
+
+        return
+
+    def startMovement(self):
+        """
+        Reset the per-movement counters.
+        """
+
+        self._gc_count = 0
+        self._gc_time = 0
+        self._blocks = sys.getallocatedblocks()
+
+        return
+
+    def endMovement(self, movement):
+        """
+        Report the per-movement counters.
+        """
+
+        self.sink.writeMovement({
+            'type': movement.type,
+            'gc_count': self._gc_count,
+            'gc_time': self._gc_time / 1e6,
+            'allocated_blocks': sys.getallocatedblocks() - self._blocks
+        })
+
+        return
+
+    def _onGarbageCollection(self, phase, info):
+        """
+        Time garbage collections.
+        """
+
+        if phase == 'start':
+            self._gc_start = time.perf_counter_ns()
+        else:
+            self._gc_count += 1
+            self._gc_time += time.perf_counter_ns() - self._gc_start
+
+
+class RingBufferSink:
+    """
+    In-memory sink keeping the last capacity frames and
+    movements.
+    """
+
+    def __init__(self, capacity=10_000) -> None:
+
+        self.capacity = capacity
+        self.n_frames = 0
+        self.buffer = np.zeros((capacity, len(STAGES)), dtype=np.int64)
+        self.movements = deque(maxlen=capacity)
+
+    def writeFrame(self, stages):
+        """
+        Store the stage durations of a frame.
+        """
+        self.buffer[self.n_frames % self.capacity] = stages
+        self.n_frames += 1
+
+    def writeMovement(self, movement):
+        """
+        Store the counters of a movement.
+        """
+        self.movements.append(movement)
+
+    def close(self):
+        """
+        Nothing to release.
+        """
+        return
+
+    def frames(self):
+        """
+        Stage durations of the frames kept, oldest first, in
+        ms (one column per stage).
+        """
+
+        if self.n_frames <= self.capacity:
+            frames = self.buffer[:self.n_frames]
+        else:
+            frames = np.roll(self.buffer, -(self.n_frames % self.capacity), 0)
+
+        return frames / 1e6
+
+
+class FileSink:
+    """
+    Sink writing frame stage durations (in ns) as raw int64
+    rows to path, and movements as JSON lines to path.jsonl.
+    """
+
+    def __init__(self, path) -> None:
+
+        self._frames = open(path, 'wb')
+        self._movements = open(f'{path}.jsonl', 'w')
+
+    def writeFrame(self, stages):
+        """
+        Write the stage durations of a frame.
+        """
+        stages.tofile(self._frames)
+
+    def writeMovement(self, movement):
+        """
+        Write the counters of a movement.
+        """
+        self._movements.write(json.dumps(movement) + '\n')
+
+    def close(self):
+        """
+        Close the files.
+        """
+        self._frames.close()
+        self._movements.close()
+
+    @staticmethod
+    def load(path):
+        """
+        Stage durations written to path, in ms (one column
+        per stage).
+        """
+        return np.fromfile(path, dtype=np.int64).reshape(-1, len(STAGES)) / 1e6
@@ -0,0 +1,69 @@
+
+import numpy as np
+
+
+# Label of samples outside of any movement
+UNLABELLED = -1
+
+
+class MovementIndex:
+    """
+    Interval index of a movement queue, used to label
+    sample timestamps with the movement being played.
+
+    Movements are given by their onsets (in ms, sorted) and
+    type codes (indices into MOVEMENT_TYPES). Each movement
+    lasts until the next onset, and the last one until end.
+    """
+
+    def __init__(self, onsets, types, end) -> None:
+
+        self.onsets = np.asarray(onsets, dtype=np.float64)
+        self.types = np.asarray(types, dtype=np.int8)
+        self.end = end
+
+    @classmethod
+    def fromQueue(cls, movement_queue):
+        """
+        Index of a movement queue, on the session clock (see
+        MovementQueue.playedOnsets): movements that were not
+        played follow the last one that was.
+        """
+
+        table = movement_queue.table
+        onsets = movement_queue.playedOnsets()
+
+        end = onsets[-1] + table['duration'][-1]*1000
+
+        return cls(onsets, table['type'], end)
+
+    @classmethod
+    def fromTable(cls, movements, t):
+        """
+        Index of a saved session, from its movement table and
+        sample timestamps (see storage.loadSession).
+        """
+
+        played = movements[movements['sample_count'] > 0]
+        onsets = t[played['sample_offset']]
+        end = onsets[-1] + played['duration'][-1]*1000
+
+        return cls(onsets, played['type'], end)
+
+    def label(self, timestamps):
+        """
+        Label an array of timestamps (in ms, same clock as the
+        onsets) with the type code and the index of the movement
+        they fall in. A timestamp on a boundary belongs to the
+        movement starting there. Timestamps outside of the queue
+        get UNLABELLED for both.
+        """
+
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+
+        ids = np.searchsorted(self.onsets, timestamps, side='right') - 1
+        inside = (ids >= 0) & (timestamps < self.end)
+        ids = np.where(inside, ids, UNLABELLED)
+        labels = np.where(inside, self.types[ids], UNLABELLED)
+
+        return labels.astype(np.int8), ids
@@ -1,11 +1,17 @@
 
-from calibrations import TernaryCalibration
-from calibrations import BinaryCalibration
-from menus import MainMenu, ExportMenu
-from __init__ import CONFIG
+from .calibrations import TernaryCalibration
+from .calibrations import BinaryCalibration
+from .menus import MainMenu, ExportMenu
+from .storage import saveSession, SessionWriter
+from .tracker import TrackerReceiver
+from .resample import resampleTrace
+from .presentation import openWindow, getFrameRate, getWindowScale
+from .config import Config, CONFIG
 
 from datetime import datetime
-import pandas as pd
+import argparse
+import json
+import os
 import numpy as np
 import pickle
 import pygame
@@ -13,27 +19,31 @@ import pygame
 
 class Experiment:
 
-    def __init__(self) -> None:
+    def __init__(self, config=CONFIG) -> None:
 
-        # Monitor info
-        self.pixel_size = CONFIG['monitor']['monitor_width'] / \
-            CONFIG['monitor']['horizontal_pixel_resolution']
-        self.viewing_distance = CONFIG['monitor']['viewing_distance']
+        self.config = config
 
         # Initiate PyGame
         pygame.init()
         pygame.display.set_caption('Calibration')
-        self.screen = pygame.display.set_mode(
-            (CONFIG['global']['window_width'],
-             CONFIG['global']['window_height'])
-        )
+        self.screen, self.vsync = openWindow(config)
+
+        # Monitor info. Positions are in window pixels, which
+        # span several display pixels if the window is scaled
+        self.scale = getWindowScale(self.screen)
+        self.pixel_size = config.pixel_size * self.scale
+        self.viewing_distance = config.monitor.viewing_distance
+
+        # Frame rate of the sessions, locked to the display
+        # refresh where possible
+        self.fps = getFrameRate(config, self.vsync)
 
         # Main loop
         completed = False
         while not completed:
 
             # Main menu
-            self._main_menu = MainMenu(self.screen)
+            self._main_menu = MainMenu(self.screen, config=config)
             self.calibration_id = self._main_menu.getChoice()
 
             # Exit condition
@@ -41,8 +51,16 @@ class Experiment:
                 return
 
             # Calibration experiment
-            self.calibration = self._launchCalibration(
-                self.calibration_id, self.screen
+            calibration_class = self._getCalibrationClass(self.calibration_id)
+            self.filename = self._getFilename(calibration_class)
+            self.calibration = calibration_class(
+                self.screen,
+                sink=self._createSink(calibration_class),
+                tracker=self._createTracker(),
+                realtime=config.realtime.enabled,
+                config=config,
+                fps=self.fps,
+                vsync=self.vsync
             )
 
             completed = not self.calibration.early_break
@@ -51,7 +69,7 @@ class Experiment:
         self._generateData()
 
         # Export menu
-        self._export_menu = ExportMenu(self.screen)
+        self._export_menu = ExportMenu(self.screen, config=config)
 
         # Exit condition
         if self._export_menu.exit_condition:
@@ -61,10 +79,10 @@ class Experiment:
             self._exportData()
 
     @staticmethod
-    def _launchCalibration(calibration_id, screen):
+    def _getCalibrationClass(calibration_id):
         """
-        Launch binary or ternary calibration depending
-        on which button was pressed.
+        Binary or ternary calibration depending on which
+        button was pressed.
         """
 
         calibrations = {
@@ -73,28 +91,61 @@ class Experiment:
         }
 
         try:
-            return calibrations[calibration_id](screen)
+            return calibrations[calibration_id]
 
         except KeyError:
             raise RuntimeError('How did that happen?!')
 
-    def _generateData(self):
+    @staticmethod
+    def _getFilename(calibration_class):
         """
-        Generate data from the stimulus movements.
+        Name of the session files, from the session start
+        date and the calibration type.
         """
 
-        # Initialize time series data structure for export
-        self.data = {
-            't': [],
-            'x': [],
-            'y': []
-        }
+        now = datetime.now()
+        date = now.strftime("%Y_%m_%d-%H_%M_%S")
 
-        for movement in self.calibration.getStimulusMovements():
+        return f'{date}-{calibration_class.type}'
+
+    def _createSink(self, calibration_class):
+        """
+        Streaming sink writing the session in the binary
+        format while it runs, if enabled in the config.
+        """
+
+        if not self.config.export.stream:
+            return None
+
+        return SessionWriter(
+            f'results/{self.filename}',
+            self.config.toDict() | {
+                'type': calibration_class.type,
+                'fps': self.fps,
+                'window_scale': self.scale
+            }
+        )
+
+    def _createTracker(self):
+        """
+        Eye-tracker receiver, if enabled in the config.
+        """
+
+        if not self.config.tracker.enabled:
+            return None
+
+        return TrackerReceiver(
+            self.config.tracker.host, self.config.tracker.port
+        )
+
+    def _generateData(self):
+        """
+        Generate data from the stimulus movements.
+        """
 
-            self.data['t'] += movement.timestamps
-            self.data['x'] += movement.positions['x']
-            self.data['y'] += movement.positions['y']
+        # Time series data for export, as views into the
+        # calibration sample buffer
+        self.data = self.calibration.getSamples()
 
         return
 
@@ -103,30 +154,103 @@ class Experiment:
         Export data from the calibration
         """
 
+        # Results are written relative to the working directory
+        os.makedirs('results', exist_ok=True)
+
         # Get time series data
-        data = pd.DataFrame(data={
+        data = {
             't': self.data['t'],
             'x': self._pixToDeg(self.data['x']),
-            'y': self._pixToDeg(self.data['y'])
-        })
+            'y': self._pixToDeg(self.data['y']),
+            'delay': self.data['delay']
+        }
 
-        # Get stimulus movements
-        experiment = {key: val for key, val in CONFIG.items()}
+        # Get stimulus movements. Their samples are already in
+        # the time series, the movement table only keeps offsets
+        # into it
+        experiment = self.calibration.config.toDict()
         movements = self.calibration.getStimulusMovements()
-        experiment['movements'] = [movement.__dict__ for movement in movements]
+        experiment['movements'] = movements.toArray()
+        experiment['onsets'] = movements.recordedOnsets()
+
+        # pandas is slow to import and only used here
+        import pandas as pd
 
         # Export them...
-        now = datetime.now()
-        date = now.strftime("%Y_%m_%d-%H_%M_%S")
-        filename = f'{date}-{self.calibration.type}'
+        filename = self.filename
 
         # ... as a csv file ...
-        data.to_csv(f'results/{filename}.csv', index=False)
+        pd.DataFrame(data=data).to_csv(f'results/{filename}.csv', index=False)
+
+        # ... possibly resampled on a uniform timebase ...
+        rate = self.calibration.config.export.resample_rate
+        if rate:
+            resampled = resampleTrace(
+                self.data['t'], self.data['x'], self.data['y'],
+                movements.toArray(), rate
+            )
+            pd.DataFrame(data={
+                't': resampled['t'],
+                'x': self._pixToDeg(resampled['x']),
+                'y': self._pixToDeg(resampled['y'])
+            }).to_csv(f'results/{filename}-{rate}hz.csv', index=False)
+
+        # ... in the columnar binary format, unless it was
+        # already streamed during the session ...
+        if self.calibration.sink is None:
+            saveSession(
+                f'results/{filename}', self.data, movements.toArray(),
+                self.calibration.config.toDict() | {
+                    'type': self.calibration.type,
+                    'fps': self.calibration.fps,
+                    'window_scale': self.scale
+                },
+                encoding=self.calibration.config.export.encoding
+            )
 
-        # ... and as a pickle file
+        # ... as a pickle file ...
         with open(f'results/{filename}.pkl', 'wb') as f:
             pickle.dump(experiment, f)
 
+        # ... along with the frame timing quality ...
+        with open(f'results/{filename}-timing.json', 'w') as f:
+            json.dump(self.calibration.getFrameTimingReport(), f, indent=2)
+
+        # ... and the gaze samples, if any
+        if self.calibration.tracker is not None:
+            self._exportGaze(filename, data)
+
+        return
+
+    def _exportGaze(self, filename, data):
+        """
+        Export the gaze samples, aligned with the stimulus:
+        each gaze sample comes with the target position (in
+        degrees) displayed at its time on the session clock.
+        """
+
+        import pandas as pd
+
+        gaze = self.calibration.getGaze()
+
+        # Last stimulus sample at or before each gaze sample
+        i = np.searchsorted(data['t'], gaze['t'], side='right') - 1
+        i = np.clip(i, 0, len(data['t'])-1)
+
+        pd.DataFrame(data={
+            't': gaze['t'],
+            'x': gaze['x'],
+            'y': gaze['y'],
+            'target_x': data['x'][i],
+            'target_y': data['y'][i]
+        }).to_csv(f'results/{filename}-gaze.csv', index=False)
+
+        with open(f'results/{filename}-gaze.json', 'w') as f:
+            json.dump({
+                'drift': gaze['drift'],
+                'offset': gaze['offset']
+            }, f, indent=2)
+
         return
 
     def _pixToDeg(self, distance):
@@ -137,10 +261,17 @@ class Experiment:
         Thus, the (x, y) coordinates must be centered beforehand.
         """
         return np.arctan2(
-            (np.array(distance)*self.pixel_size), self.viewing_distance
+            (np.asarray(distance)*self.pixel_size), self.viewing_distance
         ) * 180 / np.pi
 
 
 if __name__ == '__main__':
 
-    exp = Experiment()
+    parser = argparse.ArgumentParser(description='Run a calibration session.')
+    parser.add_argument(
+        '-c', '--config', default=None,
+        help='config file (config.yml of the package by default)'
+    )
+    args = parser.parse_args()
+
+    exp = Experiment(Config.load(args.config))
@@ -1,21 +1,22 @@
 
-from gui import Button, Text
-from __init__ import CONFIG
+from .gui import Button, Text
+from .config import CONFIG
 
 import pygame
 
 
 class Menu:
 
-    def __init__(self, screen) -> None:
+    def __init__(self, screen, config=CONFIG) -> None:
 
         # Exit parameter
         self.exit_condition = False
 
         # Screen parameters
         self.screen = screen
-        self.w = CONFIG['global']['window_width']
-        self.h = CONFIG['global']['window_height']
+        self.config = config
+        self.w = config.window_width
+        self.h = config.window_height
 
     def getChoice(self):
         """
@@ -23,44 +24,45 @@ class Menu:
         """
         return self.button_id
 
-    def _awaitSelection(self):
+    def _awaitSelection(self, timeout=1000):
         """
         Wait for the user to click on one of the buttons.
-        """
 
-        # Game clock
-        clock = pygame.time.Clock()
+        Blocks on the event queue (waking up at least every
+        timeout ms), redraws only when the window needs it and
+        hit-tests the buttons on clicks only.
+        """
 
-        click = False
-        self.running = True
-        while self.running:
+        # Mouse motion does not change anything on menus
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
 
-            # Mouse control
-            mx, my = pygame.mouse.get_pos()
+        # Draw once
+        self._draw()
 
-            # Detect clicks on menu buttons
-            for i, button in enumerate(self.buttons):
-                if button.rect.collidepoint((mx, my)):
-                    if click:
-                        return i
+        self.running = True
+        try:
+            while self.running:
 
-            click = False
-            # Event queue
-            for event in pygame.event.get():
+                event = pygame.event.wait(timeout)
 
                 # Exit conditions
                 self._catchExit(event)
 
-                # Mouse click
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:
-                        click = True
+                # Mouse click on a button
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    for i, button in enumerate(self.buttons):
+                        if button.rect.collidepoint(event.pos):
+                            return i
 
-            # Draw
-            self._draw()
+                # Window content lost
+                elif event.type in (
+                    pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED,
+                    pygame.WINDOWRESTORED, pygame.WINDOWSIZECHANGED
+                ):
+                    self._draw()
 
-            # 10 fps
-            clock.tick(10)
+        finally:
+            pygame.event.set_allowed(pygame.MOUSEMOTION)
 
         return
 
@@ -85,7 +87,7 @@ class Menu:
         """
 
         # Draw background
-        self.screen.fill(CONFIG['global']['bg_color'])
+        self.screen.fill(self.config.bg_color)
 
         # Draw buttons
         for button in self.buttons:
@@ -103,19 +105,19 @@ class Menu:
 
 class MainMenu(Menu):
 
-    def __init__(self, screen) -> None:
-        super().__init__(screen)
+    def __init__(self, screen, config=CONFIG) -> None:
+        super().__init__(screen, config=config)
 
         # Layout
         self.buttons = [
-            Button(x, y)
+            Button(x, y, config=config)
             for x, y in zip(
                 [self.w/2-self.w/8, self.w/2-self.w/8],
                 [self.h/2-self.h/7-self.h/18, self.h/2+self.h/18]
             )
         ]
         self.texts = [
-            Text(text, button) for text, button
+            Text(text, button, config=config) for text, button
             in zip(
                 ['Binary calibration', 'Ternary calibration'],
                 self.buttons
@@ -128,19 +130,20 @@ class MainMenu(Menu):
 
 class ExportMenu(Menu):
 
-    def __init__(self, screen) -> None:
-        super().__init__(screen)
+    def __init__(self, screen, config=CONFIG) -> None:
+        super().__init__(screen, config=config)
 
         # Layout
         self.buttons = [
             Button(
                 self.w/2-self.w/8,
-                self.h/2-self.h/7/2
+                self.h/2-self.h/7/2,
+                config=config
             )
         ]
 
         self.texts = [
-            Text('Export results', self.buttons[0])
+            Text('Export results', self.buttons[0], config=config)
         ]
 
         # Await user input
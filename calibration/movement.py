@@ -1,32 +1,439 @@
 
+import numpy as np
+
+
+# Movement type codes, as stored in movement tables
+MOVEMENT_TYPES = ('fixation', 'saccade', 'pursuit')
+
+# Record of a movement in a movement table. Positions
+# and velocities are in screen pixels, durations in s,
+# and samples are given as offset/count into the
+# session sample arrays
+MOVEMENT_DTYPE = np.dtype([
+    ('type', np.uint8),
+    ('start_pos', np.float64, (2,)),
+    ('end_pos', np.float64, (2,)),
+    ('amplitude', np.float64),
+    ('velocity', np.float64, (2,)),
+    ('duration', np.float64),
+    ('sample_offset', np.int64),
+    ('sample_count', np.int64)
+])
+
+
+def holdPosition(start_pos, end_pos, velocity, duration, t):
+    """
+    Position of a still target: its start position.
+    """
+    return start_pos[..., 0] + 0*t, start_pos[..., 1] + 0*t
+
+
+def jumpPosition(start_pos, end_pos, velocity, duration, t):
+    """
+    Position of a target jumping to its end position at half
+    the movement duration.
+    """
+    done = t >= duration/2
+    return (
+        np.where(done, end_pos[..., 0], start_pos[..., 0]),
+        np.where(done, end_pos[..., 1], start_pos[..., 1])
+    )
+
+
+def linearPosition(start_pos, end_pos, velocity, duration, t):
+    """
+    Position of a target moving at constant velocity.
+    """
+    return (
+        start_pos[..., 0] + velocity[..., 0]*t,
+        start_pos[..., 1] + velocity[..., 1]*t
+    )
+
+
+# Position of the target during each type of movement, as a
+# function of the movement parameters (positions of shape
+# (..., 2)) and of the times t since its onset (in s, within
+# [0, duration]). New movement types are added to
+# MOVEMENT_TYPES along with their position function
+POSITION_FUNCTIONS = {
+    'fixation': holdPosition,
+    'saccade': jumpPosition,
+    'pursuit': linearPosition
+}
+
+
+# Onset of a single movement that was not played, shared
+# until an onset is set
+_NOT_PLAYED = np.full(1, np.nan)
+_NOT_PLAYED.flags.writeable = False
+
+
 class EyeMovement:
+    """
+    Stimulus movement, as a record of a movement table.
+
+    The movement parameters are kept in a row of a
+    MOVEMENT_DTYPE structured array: that of the MovementQueue
+    it was appended to, or a table of its own until then.
+    Positions and velocities are read as views into that row,
+    and sample offsets and onsets are written to it.
+    """
+
+    __slots__ = ('_queue', '_index')
 
     def __init__(
         self, type, start_pos, end_pos,
         amplitude, velocity, duration
     ) -> None:
 
-        self.type = type
-        self.start_pos = start_pos
-        self.end_pos = end_pos
-        self.amplitude = amplitude
-        self.velocity = velocity
-        self.duration = duration
+        self._queue = MovementQueue._single((
+            MOVEMENT_TYPES.index(type), start_pos, end_pos,
+            amplitude, velocity, duration, 0, 0
+        ))
+        self._index = 0
+
+    @classmethod
+    def _bind(cls, queue, index):
+        """
+        Movement backed by a row of a queue.
+        """
+
+        movement = object.__new__(cls)
+        movement._queue = queue
+        movement._index = index
+
+        return movement
+
+    def __repr__(self):
+        return f'EyeMovement({self.type!r}, duration={self.duration:.3f})'
+
+    @property
+    def type(self):
+        return MOVEMENT_TYPES[self._queue._table['type'][self._index]]
+
+    @property
+    def start_pos(self):
+        return self._queue._table['start_pos'][self._index]
+
+    @property
+    def end_pos(self):
+        return self._queue._table['end_pos'][self._index]
+
+    @property
+    def amplitude(self):
+        return self._queue._table['amplitude'][self._index]
+
+    @property
+    def velocity(self):
+        return self._queue._table['velocity'][self._index]
+
+    @property
+    def duration(self):
+        return self._queue._table['duration'][self._index]
+
+    @property
+    def sample_offset(self):
+        return self._queue._table['sample_offset'][self._index]
+
+    @sample_offset.setter
+    def sample_offset(self, value):
+        self._queue._table['sample_offset'][self._index] = value
 
-    def addTimestamps(self, timestamps):
+    @property
+    def sample_count(self):
+        return self._queue._table['sample_count'][self._index]
+
+    @sample_count.setter
+    def sample_count(self, value):
+        self._queue._table['sample_count'][self._index] = value
+
+    @property
+    def onset(self):
+        """
+        Onset of the movement when it was played, in ms on the
+        session clock.
+        """
+        onset = self._queue._onsets[self._index]
+        if np.isnan(onset):
+            raise AttributeError('Movement not played.')
+        return onset
+
+    @onset.setter
+    def onset(self, value):
+        if self._queue._onsets is _NOT_PLAYED:
+            self._queue._onsets = _NOT_PLAYED.copy()
+        self._queue._onsets[self._index] = value
+
+    @property
+    def timestamps(self):
+        """
+        Timestamps of the samples of the movement.
+        """
+        return self._samples('t')
+
+    @property
+    def positions(self):
+        """
+        Successive stimulus positions of the movement.
+        """
+        return {'x': self._samples('x'), 'y': self._samples('y')}
+
+    def toRecord(self):
         """
-        Add timestamps for the stimulus.
+        Movement as a MOVEMENT_DTYPE record. Movements that
+        were not played have no samples.
+        """
+        return self._queue._table[self._index].copy()
+
+    def position(self, t):
+        """
+        Evaluate the stimulus position at times t (in s,
+        relative to the movement onset).
+
+        Returns the x and y arrays, in the same screen
+        coordinates as start_pos and end_pos. Times outside
+        of [0, duration] are clipped to the movement bounds.
         """
 
-        self.timestamps = timestamps
+        t = np.clip(np.asarray(t, dtype=float), 0, self.duration)
+
+        return POSITION_FUNCTIONS[self.type](
+            self.start_pos, self.end_pos, self.velocity, self.duration, t
+        )
+
+    def _samples(self, column):
+        """
+        Samples of the movement, as a view into a column of
+        the samples bound to its queue.
+        """
+
+        if self._queue._samples is None:
+            raise AttributeError('No samples bound to the movement queue.')
+
+        offset = self.sample_offset
+
+        return self._queue._samples[column][offset:offset+self.sample_count]
+
+
+class MovementQueue:
+    """
+    Ordered movements, played back to back.
+
+    Movements are stored in a single MOVEMENT_DTYPE structured
+    array (the movement table), which grows as movements are
+    appended, along with their recorded onsets. Iterating or
+    indexing with an integer gives EyeMovement records backed
+    by the table. Indexing with a slice, a boolean mask or an
+    array of indices gives a new queue holding a copy of the
+    selected rows.
+    """
+
+    __slots__ = ('_table', '_onsets', '_size', '_samples')
+
+    def __init__(self, movements=(), capacity=64) -> None:
+
+        self._table = np.zeros(capacity, dtype=MOVEMENT_DTYPE)
+        self._onsets = np.full(capacity, np.nan)
+        self._size = 0
+
+        # Session samples, indexed by the sample offsets
+        self._samples = None
+
+        for movement in movements:
+            self.append(movement)
+
+    @classmethod
+    def _single(cls, record):
+        """
+        Queue of a single, unplayed movement record, built with
+        as few allocations as possible.
+        """
+
+        queue = cls.__new__(cls)
+        queue._table = np.empty(1, dtype=MOVEMENT_DTYPE)
+        queue._table[0] = record
+        queue._onsets = _NOT_PLAYED
+        queue._size = 1
+        queue._samples = None
+
+        return queue
+
+    @classmethod
+    def fromArray(cls, table, onsets=None):
+        """
+        Queue of the movements of a movement table, with their
+        recorded onsets if any (in ms).
+        """
+
+        queue = cls(capacity=0)
+        queue._table = np.array(table, dtype=MOVEMENT_DTYPE)
+        queue._size = len(queue._table)
+        queue._onsets = np.full(queue._size, np.nan) if onsets is None \
+            else np.array(onsets, dtype=np.float64)
+
+        return queue
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield EyeMovement._bind(self, index)
+
+    def __getitem__(self, key):
+
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self._size
+            if not 0 <= key < self._size:
+                raise IndexError('Movement index out of range.')
+            return EyeMovement._bind(self, int(key))
+
+        rows = np.arange(self._size)[key]
+        queue = MovementQueue.fromArray(self._table[rows], self._onsets[rows])
+        queue._samples = self._samples
+
+        return queue
+
+    def __reduce__(self):
+        return (
+            MovementQueue.fromArray, (self.toArray(), self.recordedOnsets())
+        )
+
+    @property
+    def table(self):
+        """
+        Movement table, as a view (no copy).
+        """
+        return self._table[:self._size]
+
+    def append(self, movement):
+        """
+        Append a movement. The movement is then backed by the
+        table of the queue.
+        """
+
+        self._appendRecord(
+            movement._queue._table[movement._index],
+            movement._queue._onsets[movement._index]
+        )
+        movement._queue = self
+        movement._index = self._size - 1
 
         return
-    
-    def addPositions(self, positions):
+
+    def bindSamples(self, samples):
+        """
+        Give the movements access to their samples (t, x and
+        y arrays of the session, see EyeMovement.timestamps and
+        EyeMovement.positions).
+        """
+
+        self._samples = samples
+
+        return
+
+    def onsets(self):
         """
-        Add stimulus successive positions.
+        Nominal onset of each movement, in s since the
+        beginning of the queue.
         """
 
-        self.positions = positions
+        durations = self.table['duration']
+
+        return np.concatenate(([0.], np.cumsum(durations)[:-1]))
+
+    def recordedOnsets(self):
+        """
+        Onset of each movement when the queue was played, in
+        ms on the session clock (NaN for movements that were
+        not played).
+        """
+        return self._onsets[:self._size].copy()
+
+    def playedOnsets(self):
+        """
+        Onset of each movement on the session clock, in ms:
+        the recorded one for the movements that were played,
+        and the nominal one from the last recorded onset for
+        the others (after an early exit). Nominal onsets for a
+        queue that was not played.
+        """
+
+        onsets = self.recordedOnsets()
+        nominal = self.onsets() * 1000
+
+        played = np.flatnonzero(~np.isnan(onsets))
+        if not len(played):
+            return nominal
+
+        last = played[-1]
+        missing = np.isnan(onsets)
+        onsets[missing] = onsets[last] + nominal[missing] - nominal[last]
+
+        return onsets
+
+    def duration(self):
+        """
+        Total duration of the queue, in s.
+        """
+        return float(self.table['duration'].sum())
+
+    def toArray(self):
+        """
+        Movement table of the queue, as a structured array
+        of MOVEMENT_DTYPE records.
+        """
+        return self.table.copy()
+
+    def position(self, t):
+        """
+        Evaluate the stimulus position at times t (in s,
+        since the beginning of the queue).
+
+        Returns the x and y arrays, in screen coordinates.
+        Times before the first or after the last movement are
+        clipped to the queue bounds.
+        """
+
+        t = np.asarray(t, dtype=float)
+        table = self.table
+
+        # Movement being played at each time
+        onsets = self.onsets()
+        i = np.clip(np.searchsorted(onsets, t, side='right')-1,
+                    0, len(self)-1)
+        dt = np.clip(t-onsets[i], 0, table['duration'][i])
+
+        # Positions, by movement type
+        x = np.empty(t.shape)
+        y = np.empty(t.shape)
+        for code, type in enumerate(MOVEMENT_TYPES):
+            played = table['type'][i] == code
+            movements = table[i[played]]
+            x[played], y[played] = POSITION_FUNCTIONS[type](
+                movements['start_pos'], movements['end_pos'],
+                movements['velocity'], movements['duration'], dt[played]
+            )
+
+        return x, y
+
+    def _appendRecord(self, record, onset=np.nan):
+        """
+        Append a MOVEMENT_DTYPE record, growing the table if it
+        is full.
+        """
+
+        if self._size == len(self._table):
+            capacity = max(2*len(self._table), 1)
+            table = np.zeros(capacity, dtype=MOVEMENT_DTYPE)
+            table[:self._size] = self._table[:self._size]
+            onsets = np.full(capacity, np.nan)
+            onsets[:self._size] = self._onsets[:self._size]
+            self._table, self._onsets = table, onsets
+
+        self._table[self._size] = record
+        self._onsets[self._size] = onset
+        self._size += 1
 
         return
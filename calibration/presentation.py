@@ -0,0 +1,94 @@
+
+import numpy as np
+import time
+
+
+# Frame rate used when the refresh rate is neither given nor
+# measurable, in Hz
+DEFAULT_FPS = 100
+
+# Highest plausible display refresh rate, in Hz
+MAX_REFRESH_RATE = 500
+
+# Video drivers without a display to sync to
+VIRTUAL_DRIVERS = ('dummy', 'offscreen')
+
+
+def openWindow(config):
+    """
+    Open the window of the config size, with flips locked to
+    the display refresh (vsync) if enabled in the config and
+    supported by the SDL backend.
+
+    Returns the window surface and whether vsync is on.
+    """
+
+    import pygame
+
+    if config.display.vsync \
+            and pygame.display.get_driver() not in VIRTUAL_DRIVERS:
+        try:
+            return pygame.display.set_mode(
+                config.window_size, pygame.SCALED, vsync=1
+            ), True
+        except pygame.error:
+            pass
+
+    return pygame.display.set_mode(config.window_size), False
+
+
+def getWindowScale(screen):
+    """
+    Number of display pixels per window pixel. With vsync, the
+    window may be enlarged by a whole factor to fit the desktop
+    (PyGame SCALED mode), while positions stay in window pixels.
+    """
+
+    import pygame
+
+    return pygame.display.get_window_size()[0] / screen.get_width()
+
+
+def measureRefreshRate(n_frames=120, flip=None, now=time.perf_counter_ns):
+    """
+    Measure the display refresh rate, in Hz, from the median
+    interval between n_frames vsync-locked flips (of the
+    PyGame display by default).
+
+    Returns None if flips are not paced by the display (more
+    than MAX_REFRESH_RATE per second).
+    """
+
+    if flip is None:
+        import pygame
+        flip = pygame.display.flip
+
+    marks = np.empty(n_frames+1, dtype=np.int64)
+    marks[0] = now()
+    for i in range(1, n_frames+1):
+        flip()
+        marks[i] = now()
+
+    refresh_rate = 1e9 / np.median(np.diff(marks))
+    if refresh_rate > MAX_REFRESH_RATE:
+        return None
+
+    return refresh_rate
+
+
+def getFrameRate(config, vsync):
+    """
+    Frame rate of the sessions: the refresh rate of the config
+    if given, otherwise the measured one when vsync is on, or
+    DEFAULT_FPS.
+    """
+
+    if config.display.refresh_rate is not None:
+        return config.display.refresh_rate
+
+    if vsync:
+        refresh_rate = measureRefreshRate()
+        if refresh_rate is not None:
+            return refresh_rate
+
+    return DEFAULT_FPS
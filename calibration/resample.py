@@ -0,0 +1,67 @@
+
+from .movement import MOVEMENT_TYPES
+
+import numpy as np
+
+
+PURSUIT = MOVEMENT_TYPES.index('pursuit')
+
+
+def resampleTrace(t, x, y, movements, rate, chunk_size=1_000_000):
+    """
+    Resample a stimulus trace on a uniform timebase.
+
+    t, x and y are the recorded samples (t in ms) and
+    movements their movement table (see MovementQueue.toArray),
+    whose offsets and counts give the samples of each movement.
+    The trace is resampled at rate (in Hz), from its first to
+    its last timestamp: positions are held during fixations,
+    step at saccades and are linearly interpolated within
+    pursuits, up to the first sample of the next movement
+    (captured on the pursuit end).
+
+    The output is computed by chunks of chunk_size samples,
+    so that long recordings (possibly memory-mapped) do not
+    need large temporary arrays. Returns contiguous t, x and
+    y arrays.
+    """
+
+    # Movement and type of each recorded sample
+    ids = np.full(len(t), -1, dtype=np.int64)
+    for i, movement in enumerate(movements):
+        offset, count = movement['sample_offset'], movement['sample_count']
+        ids[offset:offset+count] = i
+    pursuits = np.zeros(len(t), dtype=bool)
+    pursuits[ids >= 0] = movements['type'][ids[ids >= 0]] == PURSUIT
+
+    # Uniform timebase
+    period = 1000 / rate
+    n_samples = int(np.floor((t[-1]-t[0]) / period)) + 1
+    resampled = {
+        't': np.empty(n_samples, dtype=np.float64),
+        'x': np.empty(n_samples, dtype=np.float64),
+        'y': np.empty(n_samples, dtype=np.float64)
+    }
+
+    for start in range(0, n_samples, chunk_size):
+
+        stop = min(start+chunk_size, n_samples)
+        tc = t[0] + np.arange(start, stop)*period
+
+        # Last recorded sample at or before each new sample
+        i = np.searchsorted(t, tc, side='right') - 1
+        i = np.clip(i, 0, len(t)-2)
+        j = i + 1
+
+        # Held positions, interpolated within pursuits
+        interpolate = pursuits[i] & (ids[j] >= 0) & (t[j] > t[i])
+        w = np.where(
+            interpolate, (tc-t[i]) / np.where(interpolate, t[j]-t[i], 1), 0
+        )
+        w = np.clip(w, 0, 1)
+
+        resampled['t'][start:stop] = tc
+        resampled['x'][start:stop] = x[i] + w*(x[j]-x[i])
+        resampled['y'][start:stop] = y[i] + w*(y[j]-y[i])
+
+    return resampled
@@ -0,0 +1,152 @@
+
+import numpy as np
+
+
+def sampleDestinations(
+    start_pos, width, height,
+    min_duration, max_duration,
+    min_vel=0, max_vel=np.inf,
+    rng=np.random, block_size=64, max_rounds=16
+):
+    """
+    Draw a destination and a duration for each starting
+    position so that the resulting speed lies within
+    [min_vel, max_vel].
+
+    start_pos is either a single (x, y) position or an
+    (n, 2) array of positions. Destinations are uniform over
+    the [0, width] x [0, height] area and durations uniform
+    over [min_duration, max_duration], conditioned on the
+    velocity constraints.
+
+    Candidates are drawn by blocks of block_size per starting
+    position, for at most max_rounds rounds. Positions for which
+    no candidate was accepted by then are sampled directly
+    from the feasible region, so the run time is bounded.
+
+    Returns the (n, 2) destinations and the (n,) durations.
+    """
+
+    start_pos = np.atleast_2d(np.asarray(start_pos, dtype=float))
+    n = len(start_pos)
+
+    end_pos = np.empty((n, 2))
+    durations = np.empty(n)
+    pending = np.arange(n)
+
+    for _ in range(max_rounds):
+
+        if not len(pending):
+            break
+
+        # Draw a block of candidates for every pending position
+        shape = (len(pending), block_size)
+        candidates = np.stack((
+            rng.random(shape)*width,
+            rng.random(shape)*height
+        ), axis=-1)
+        candidate_durations = rng.uniform(
+            min_duration, max_duration, shape
+        )
+
+        # Velocity constraints
+        distances = np.linalg.norm(
+            candidates - start_pos[pending, np.newaxis], axis=-1
+        )
+        speeds = distances / candidate_durations
+        valid = (min_vel <= speeds) & (speeds <= max_vel)
+
+        # Keep the first valid candidate of each block
+        accepted = valid.any(axis=1)
+        first = valid.argmax(axis=1)[accepted]
+        rows = pending[accepted]
+        end_pos[rows] = candidates[accepted, first]
+        durations[rows] = candidate_durations[accepted, first]
+
+        pending = pending[~accepted]
+
+    # Unlucky positions are sampled from the feasible region
+    if len(pending):
+        end_pos[pending], durations[pending] = _sampleFeasible(
+            start_pos[pending], width, height,
+            min_duration, max_duration, min_vel, max_vel, rng
+        )
+
+    return end_pos, durations
+
+
+def _sampleFeasible(
+    start_pos, width, height,
+    min_duration, max_duration, min_vel, max_vel, rng, block_size=64
+):
+    """
+    Directly sample destinations satisfying the velocity
+    constraints.
+
+    Each destination lies in a random direction among those
+    along which the area extends at least the shortest
+    admissible distance, at a distance up to the longest one
+    that fits in the area. Should none of block_size drawn
+    directions do, the direction of the farthest corner of
+    the area, which extends the most, is taken.
+    """
+
+    n = len(start_pos)
+    min_distance = min_vel*min_duration
+    max_distance = max_vel*max_duration
+
+    # Farthest corner from each starting position
+    corners = np.stack((
+        np.where(start_pos[:, 0] < width/2, width, 0),
+        np.where(start_pos[:, 1] < height/2, height, 0)
+    ), axis=-1) - start_pos
+    corner_reach = np.linalg.norm(corners, axis=-1)
+    if np.any(min_distance > np.minimum(max_distance, corner_reach)):
+        raise ValueError(
+            'Velocity constraints cannot be met within the window.'
+        )
+
+    # Random directions, and how far the area extends along them
+    angles = rng.uniform(0, 2*np.pi, (n, block_size))
+    directions = np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+    reach = _reach(start_pos[:, np.newaxis], directions, width, height)
+
+    # First direction leaving room for the shortest distance,
+    # otherwise that of the farthest corner
+    feasible = reach >= min_distance
+    found = feasible.any(axis=1)
+    rows = np.arange(n)
+    first = feasible.argmax(axis=1)
+    direction = np.where(
+        found[:, np.newaxis], directions[rows, first],
+        corners / corner_reach[:, np.newaxis]
+    )
+    reach = np.where(found, reach[rows, first], corner_reach)
+
+    distances = rng.uniform(min_distance, np.minimum(max_distance, reach))
+    end_pos = np.clip(
+        start_pos + direction*distances[:, np.newaxis],
+        0, (width, height)
+    )
+
+    # Admissible durations for these distances
+    durations = rng.uniform(
+        np.maximum(min_duration, distances/max_vel),
+        np.minimum(max_duration, distances/max(min_vel, 1e-12))
+    )
+
+    return end_pos, durations
+
+
+def _reach(start_pos, directions, width, height):
+    """
+    Distance from starting positions to the edge of the
+    [0, width] x [0, height] area, along unit directions.
+    """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        edges = np.where(directions > 0, (width, height), 0)
+        reach = (edges - start_pos) / directions
+    reach = np.where(directions == 0, np.inf, reach)
+
+    return reach.min(axis=-1)
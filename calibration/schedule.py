@@ -0,0 +1,69 @@
+
+import numpy as np
+
+
+class FrameSchedule:
+    """
+    Frame-by-frame plan of a movement queue.
+
+    Movements start on the first frame at or after their
+    nominal onset, so that the played timeline stays within a
+    frame of the nominal one: boundaries holds the index of
+    the first frame of each movement, followed by the total
+    number of frames. x and y hold the target position
+    (top-left screen coordinates) on each frame, evaluated at
+    the frame time since the nominal onset of its movement with
+    the position functions of the movement types (see
+    POSITION_FUNCTIONS), as MovementQueue.position does.
+    """
+
+    def __init__(self, movement_queue, fps) -> None:
+
+        self.fps = fps
+
+        durations = movement_queue.table['duration']
+        self.boundaries = frameBoundaries(durations, fps)
+
+        # Target positions
+        self.x = np.empty(self.boundaries[-1])
+        self.y = np.empty(self.boundaries[-1])
+        for movement, onset, start, stop in zip(
+            movement_queue, nominalOnsets(durations),
+            self.boundaries[:-1], self.boundaries[1:]
+        ):
+            self.x[start:stop], self.y[start:stop] = movement.position(
+                np.arange(start, stop)/fps - onset
+            )
+
+    def __len__(self):
+        return len(self.x)
+
+
+def frameBoundaries(durations, fps):
+    """
+    First frame of each movement of the given durations (in
+    s), played back to back at fps, followed by the total
+    number of frames.
+
+    Each movement starts on the first frame at or after its
+    nominal onset (rounded off to absorb floating point
+    errors), or the frame after the previous one starts if the
+    previous movement is shorter than a frame.
+    """
+
+    ends = np.concatenate(([0.], np.cumsum(durations)))
+    boundaries = np.ceil(np.round(ends*fps, 6))
+
+    # At least one frame per movement
+    shift = np.arange(len(boundaries))
+    boundaries = np.maximum.accumulate(boundaries - shift) + shift
+
+    return boundaries.astype(np.int64)
+
+
+def nominalOnsets(durations):
+    """
+    Onset of each movement of the given durations (in s),
+    played back to back, in s.
+    """
+    return np.concatenate(([0.], np.cumsum(durations)[:-1]))
@@ -0,0 +1,263 @@
+
+from .movement import MOVEMENT_TYPES
+
+import numpy as np
+
+
+# Gaze sample labels: movement types, and blinks
+GAZE_LABELS = MOVEMENT_TYPES + ('blink',)
+FIXATION, SACCADE, PURSUIT, BLINK = range(len(GAZE_LABELS))
+
+
+def simulateGaze(calibration, rate=1000, rng=np.random):
+    """
+    Simulate the gaze of an observer following the stimulus
+    of a calibration session.
+
+    The gaze trajectory is a sequence of segments (fixations,
+    main-sequence saccades and pursuits) derived from the
+    movement queue, with saccade and pursuit latencies, a
+    pursuit gain below 1 compensated by catch-up saccades,
+    blinks and measurement noise (see the simulator section
+    of the calibration config). Samples are then evaluated from the
+    segments with array operations.
+
+    Returns a dict with the timestamps t (in ms, uniform at
+    the given rate in Hz), the centered gaze position x and y
+    (in pixels, NaN during blinks, same coordinates as the
+    stimulus samples) and the per-sample labels (indices into
+    GAZE_LABELS).
+    """
+
+    config = calibration.config
+    params = config.simulator
+    movement_queue = calibration.getStimulusMovements()
+
+    # Gaze trajectory, following the stimulus as it was played:
+    # movements start on their frame-rounded onsets
+    onsets = movement_queue.playedOnsets() / 1000
+    segments = _buildSegments(movement_queue, onsets, config, rng)
+    t = np.arange(0, _playedDuration(calibration), 1/rate)
+    x, y, labels = _evaluateSegments(segments, t)
+
+    # Blinks
+    blinking = _sampleBlinks(t, params, rng)
+    x[blinking] = np.nan
+    y[blinking] = np.nan
+    labels[blinking] = BLINK
+
+    # Measurement noise
+    noise = _degToPix(params.noise, config)
+    x += rng.normal(0, noise, len(t))
+    y += rng.normal(0, noise, len(t))
+
+    return {
+        't': t*1000,
+        'x': x + calibration.target.x_offset,
+        'y': calibration.target.y_offset - y,
+        'labels': labels
+    }
+
+
+def simulateGazeBatch(calibrations, rate=1000, seed=None):
+    """
+    Simulate the gaze for several sessions, each with its
+    own random generator spawned from the seed.
+    """
+
+    seeds = np.random.SeedSequence(seed).spawn(len(calibrations))
+
+    return [
+        simulateGaze(calibration, rate, np.random.default_rng(seed))
+        for calibration, seed in zip(calibrations, seeds)
+    ]
+
+
+def _playedDuration(calibration):
+    """
+    Time (in s) the stimulus was shown for, up to the end of
+    the last frame played.
+    """
+
+    t = calibration.getSamples()['t']
+    if not len(t):
+        return calibration.getStimulusMovements().duration()
+
+    return (t[-1] + 1000/calibration.fps) / 1000
+
+
+def _buildSegments(movement_queue, onsets, config, rng):
+    """
+    Gaze trajectory from the movement onsets (in s), as
+    arrays of segments, sorted by start time (in s): kind
+    (fixation, saccade or pursuit), origin, goal (saccades),
+    velocity (pursuits) and duration (saccades), positions
+    being in screen pixels.
+    """
+
+    segments = []
+    params = config.simulator
+    gain = params.pursuit_gain
+    threshold = _degToPix(params.catch_up_threshold, config)
+
+    def hold(start, origin):
+        segments.append(
+            (start, FIXATION, origin, origin, np.zeros(2), 0.)
+        )
+        return start
+
+    def saccade(start, origin, goal):
+        duration = _mainSequence(np.linalg.norm(goal-origin), config)
+        segments.append(
+            (start, SACCADE, origin, goal, np.zeros(2), duration)
+        )
+        return start + duration
+
+    def pursuit(start, origin, velocity):
+        segments.append(
+            (start, PURSUIT, origin, origin, velocity, 0.)
+        )
+        return start
+
+    # Gaze starts on the target
+    gaze = np.asarray(movement_queue[0].start_pos, dtype=float)
+    cursor = hold(0., gaze)
+
+    for movement, onset in zip(movement_queue, onsets):
+
+        # Static target: saccade to its final position, after
+        # the target steps (if it does)
+        if movement.type != 'pursuit':
+            goal = np.asarray(movement.end_pos, dtype=float)
+            if np.allclose(goal, gaze):
+                continue
+            step = onset + (movement.duration/2
+                            if movement.type == 'saccade' else 0)
+            start = max(
+                cursor,
+                step + max(0, rng.normal(*params.saccade_latency))
+            )
+            cursor = hold(saccade(start, gaze, goal), goal)
+            gaze = goal
+            continue
+
+        # Pursuit
+        end = onset + movement.duration
+        start = max(
+            cursor,
+            onset + max(0, rng.normal(*params.pursuit_latency))
+        )
+        if start >= end:
+            continue
+
+        def targetAt(time):
+            return np.asarray(movement.start_pos, dtype=float) \
+                + movement.velocity*np.clip(time-onset, 0, movement.duration)
+
+        # Time for the position error to reach the catch-up
+        # threshold, at the pursuit gain
+        speed = np.linalg.norm(movement.velocity)
+        if gain < 1 and speed > 0:
+            period = threshold / ((1-gain)*speed)
+        else:
+            period = np.inf
+
+        # Initial catch-up saccade, then smooth pursuit
+        # interleaved with catch-up saccades
+        while start < end:
+
+            origin = gaze
+            goal = targetAt(start + _mainSequence(
+                np.linalg.norm(targetAt(start)-origin), config
+            ))
+            start = saccade(start, origin, goal)
+            gaze = goal
+            if start >= end:
+                break
+
+            pursuit(start, gaze, gain*movement.velocity)
+            stop = min(start + period, end)
+            gaze = gaze + gain*movement.velocity*(stop-start)
+            start = stop
+
+        cursor = hold(max(start, end), gaze)
+
+    # As arrays
+    start, kind, origin, goal, velocity, duration = zip(*segments)
+
+    return {
+        'start': np.array(start),
+        'kind': np.array(kind, dtype=np.int8),
+        'origin': np.array(origin),
+        'goal': np.array(goal),
+        'velocity': np.array(velocity),
+        'duration': np.array(duration)
+    }
+
+
+def _evaluateSegments(segments, t):
+    """
+    Gaze position and label at times t (in s).
+    """
+
+    k = np.searchsorted(segments['start'], t, side='right') - 1
+    dt = t - segments['start'][k]
+    kind = segments['kind'][k]
+    origin = segments['origin'][k]
+
+    # Fixations and pursuits
+    position = origin + segments['velocity'][k]*dt[:, np.newaxis]
+
+    # Saccades follow a minimum-jerk profile
+    saccading = kind == SACCADE
+    progress = np.clip(
+        dt[saccading] / segments['duration'][k[saccading]], 0, 1
+    )
+    profile = progress**3 * (10 - 15*progress + 6*progress**2)
+    position[saccading] = origin[saccading] + (
+        segments['goal'][k[saccading]]-origin[saccading]
+    )*profile[:, np.newaxis]
+
+    return position[:, 0].copy(), position[:, 1].copy(), kind.copy()
+
+
+def _sampleBlinks(t, params, rng):
+    """
+    Mask of the samples at times t (in s) falling within
+    randomly occurring blinks.
+    """
+
+    n_blinks = rng.poisson(params.blink_rate*t[-1])
+    starts = np.sort(rng.uniform(0, t[-1], n_blinks))
+    ends = starts + rng.uniform(*params.blink_duration, n_blinks)
+
+    if not n_blinks:
+        return np.zeros(len(t), dtype=bool)
+
+    j = np.searchsorted(starts, t, side='right') - 1
+
+    return (j >= 0) & (t < ends[j])
+
+
+def _mainSequence(amplitude, config):
+    """
+    Saccade duration (in s) from its amplitude (in pixels).
+    """
+    return (2.2*_pixToDeg(amplitude, config) + 21) / 1000
+
+
+def _pixToDeg(distance, config):
+    """
+    Convert pixels to degrees of visual angle.
+    """
+    return np.degrees(np.arctan2(
+        distance*config.pixel_size, config.monitor.viewing_distance
+    ))
+
+
+def _degToPix(angle, config):
+    """
+    Convert degrees of visual angle to pixels.
+    """
+    return np.tan(np.radians(angle)) \
+        * config.monitor.viewing_distance / config.pixel_size
@@ -0,0 +1,284 @@
+
+from .encoding import encodeTrace, decodeTrace
+from .movement import MOVEMENT_DTYPE
+
+import numpy as np
+import threading
+import queue
+import json
+import os
+
+
+# Sample columns of a session
+COLUMNS = ('t', 'x', 'y', 'delay')
+
+# Encodings of the sample columns
+ENCODINGS = ('columns', 'events')
+
+
+def saveSession(path, data, movements, meta, encoding='columns'):
+    """
+    Save a session in the columnar binary format.
+
+    A session is a directory holding one .npy file per
+    sample column (t the planned presentation time in ms, x
+    and y the centered target position in pixels, as
+    recorded, and delay the actual minus the planned
+    presentation time in ms), the movement table (a
+    MOVEMENT_DTYPE structured array whose sample_offset and
+    sample_count index the sample columns) and a meta.json
+    file with the experiment parameters.
+
+    With the 'events' encoding, the sample columns are
+    replaced by a single compressed events.npz file holding
+    only their changes (see encodeTrace), which requires the
+    frame rate of the session as meta['fps'].
+    """
+
+    if encoding not in ENCODINGS:
+        raise ValueError(f'Unknown session encoding: {encoding}.')
+
+    os.makedirs(path, exist_ok=True)
+
+    if encoding == 'events':
+        if 'fps' not in meta:
+            raise ValueError('Event encoding requires the session fps.')
+        np.savez_compressed(
+            os.path.join(path, 'events.npz'),
+            **encodeTrace(data, movements, meta['fps'])
+        )
+    else:
+        for column in COLUMNS:
+            np.save(
+                os.path.join(path, f'{column}.npy'),
+                np.ascontiguousarray(data[column], dtype=np.float64)
+            )
+    np.save(
+        os.path.join(path, 'movements.npy'),
+        np.asarray(movements, dtype=MOVEMENT_DTYPE)
+    )
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    return
+
+
+def loadSession(path, mmap=True):
+    """
+    Load a session saved by saveSession.
+
+    Sample columns and the movement table are memory-mapped
+    (read-only) unless mmap is False, so that only the parts
+    actually accessed are read from disk. Sessions saved
+    before presentation delays were recorded have no delay
+    column. Event-encoded sessions are decoded in memory.
+    """
+
+    mmap_mode = 'r' if mmap else None
+
+    movements = np.load(
+        os.path.join(path, 'movements.npy'), mmap_mode=mmap_mode
+    )
+    if os.path.exists(os.path.join(path, 'events.npz')):
+        with np.load(os.path.join(path, 'events.npz')) as events:
+            session = decodeTrace(events, movements)
+    else:
+        session = {
+            column: np.load(
+                os.path.join(path, f'{column}.npy'), mmap_mode=mmap_mode
+            )
+            for column in COLUMNS
+            if os.path.exists(os.path.join(path, f'{column}.npy'))
+        }
+    session['movements'] = movements
+    with open(os.path.join(path, 'meta.json'), 'r') as f:
+        session['meta'] = json.load(f)
+
+    return session
+
+
+def loadSessions(directory, mmap=True):
+    """
+    Load every session saved in a directory, sorted by
+    name.
+    """
+
+    return [
+        loadSession(os.path.join(directory, name), mmap=mmap)
+        for name in sorted(os.listdir(directory))
+        if os.path.isfile(os.path.join(directory, name, 'meta.json'))
+    ]
+
+
+def concatenateSessions(sessions):
+    """
+    Combine sessions into single sample columns and a
+    single movement table.
+
+    Movement sample offsets are shifted accordingly, and
+    a 'session' column gives the index of the session each
+    sample comes from. Only the columns of all sessions are
+    kept.
+    """
+
+    lengths = np.array([len(session['t']) for session in sessions])
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    combined = {
+        column: np.concatenate([session[column] for session in sessions])
+        for column in COLUMNS
+        if all(column in session for session in sessions)
+    }
+    combined['session'] = np.repeat(np.arange(len(sessions)), lengths)
+
+    movements = []
+    for offset, session in zip(offsets, sessions):
+        table = np.array(session['movements'])
+        table['sample_offset'] += offset
+        movements.append(table)
+    combined['movements'] = np.concatenate(movements)
+
+    return combined
+
+
+class SessionWriter:
+    """
+    Streaming sink for the samples and movements of a
+    session.
+
+    Chunks are appended to raw files by a background thread,
+    so that the render loop never waits for the disk. close()
+    turns the raw files into the saveSession format. Should
+    the session be interrupted before that, recoverSession
+    does the same with whatever reached the disk.
+    """
+
+    def __init__(self, path, meta, max_pending=16) -> None:
+
+        self.path = path
+        self.meta = meta
+
+        # Raw files, and the meta needed to recover them
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'stream.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        self._files = {
+            name: open(os.path.join(path, f'{name}.bin'), 'ab')
+            for name in COLUMNS + ('movements',)
+        }
+
+        # Background writer, fed with a bounded queue
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def writeSamples(self, t, x, y, delay):
+        """
+        Queue a chunk of samples for writing.
+        """
+
+        self._queue.put((
+            COLUMNS,
+            (np.array(t, dtype=np.float64),
+             np.array(x, dtype=np.float64),
+             np.array(y, dtype=np.float64),
+             np.array(delay, dtype=np.float64))
+        ))
+
+        return
+
+    def writeMovement(self, record):
+        """
+        Queue a movement record for writing.
+        """
+
+        self._queue.put((
+            ('movements',), (np.array([record], dtype=MOVEMENT_DTYPE),)
+        ))
+
+        return
+
+    def close(self):
+        """
+        Wait for pending chunks and finish the session
+        files.
+        """
+
+        self._queue.put(None)
+        self._thread.join()
+        for f in self._files.values():
+            f.close()
+
+        _finishStream(self.path, self.meta)
+
+        return
+
+    def _write(self):
+        """
+        Writer thread loop.
+        """
+
+        while True:
+
+            item = self._queue.get()
+            if item is None:
+                return
+
+            for name, array in zip(*item):
+                array.tofile(self._files[name])
+                self._files[name].flush()
+
+
+def recoverSession(path):
+    """
+    Finish the files of an interrupted streamed session,
+    keeping all the samples and movements that were written.
+    """
+
+    with open(os.path.join(path, 'stream.json'), 'r') as f:
+        meta = json.load(f)
+    meta['recovered'] = True
+
+    _finishStream(path, meta)
+
+    return
+
+
+def _finishStream(path, meta):
+    """
+    Convert the raw files of a streamed session to the
+    saveSession format, and remove them.
+    """
+
+    def readRaw(name, dtype):
+        filename = os.path.join(path, f'{name}.bin')
+        size = os.path.getsize(filename) // dtype.itemsize
+        if not size:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(filename, dtype=dtype, mode='r', shape=(size,))
+
+    # Columns may have been cut at different lengths
+    data = {column: readRaw(column, np.dtype(np.float64))
+            for column in COLUMNS}
+    n_samples = min(len(data[column]) for column in COLUMNS)
+    data = {column: data[column][:n_samples] for column in COLUMNS}
+
+    # Movements whose samples did not all reach the disk are cut
+    movements = np.array(readRaw('movements', MOVEMENT_DTYPE))
+    movements = movements[movements['sample_offset'] <= n_samples]
+    movements['sample_count'] = np.minimum(
+        movements['sample_count'], n_samples-movements['sample_offset']
+    )
+
+    saveSession(
+        path, data, movements, meta,
+        encoding=meta.get('export', {}).get('encoding', 'columns')
+    )
+
+    # Release the raw files before removing them
+    del data
+    for name in COLUMNS + ('movements', 'stream'):
+        extension = 'json' if name == 'stream' else 'bin'
+        os.remove(os.path.join(path, f'{name}.{extension}'))
+
+    return
@@ -1,30 +1,43 @@
 
-from __init__ import CONFIG
-from movement import EyeMovement
+from .config import CONFIG
+from .assets import ASSETS
+from .movement import EyeMovement
+from .sampling import sampleDestinations
 
 import numpy as np
-import pygame
 
 
-class Target(pygame.sprite.Sprite):
+class Target:
 
-    def __init__(self) -> None:
-        super(Target, self).__init__()
+    def __init__(self, rng=np.random, config=CONFIG) -> None:
+
+        # Random number generator of the movement generators
+        self.rng = rng
+        self.config = config
 
         # Aesthetics
-        self.surf = pygame.image.load("assets/target.png")
+        self.surf = ASSETS.image(config.target_image, config.target.size)
         self.rect = self.surf.get_rect()
 
+        # Top-left positions keeping the target on screen
+        self.x_max = config.window_width - self.surf.get_width()
+        self.y_max = config.window_height - self.surf.get_height()
+
         # Initialize position at the center of the screen
-        self.x = (CONFIG['global']['window_width']-self.surf.get_width())/2
-        self.y = (CONFIG['global']['window_height']-self.surf.get_height())/2
+        self.x = self.x_max/2
+        self.y = self.y_max/2
         self.rect.x = self.x
         self.rect.y = self.y
 
+        # Offsets from the top-left position to the centered
+        # coordinates (y axis pointing up)
+        self.x_offset = -self.x_max/2
+        self.y_offset = self.y_max/2
+
     def _getCenteredPos(self):
         return np.array([
-            self.x+self.surf.get_width()/2-CONFIG['global']['window_width']/2,
-            CONFIG['global']['window_height']/2-self.y-self.surf.get_height()/2
+            self.x + self.x_offset,
+            self.y_offset - self.y
         ])
 
     def _getPos(self):
@@ -38,9 +51,9 @@ class Target(pygame.sprite.Sprite):
 
         amplitude = 0
         velocity = np.array([0, 0])
-        duration = np.random.uniform(
-            CONFIG['fixation']['min_duration'],
-            CONFIG['fixation']['max_duration']
+        duration = self.rng.uniform(
+            self.config.fixation.min_duration,
+            self.config.fixation.max_duration
         )
         end_pos = start_pos
 
@@ -57,20 +70,16 @@ class Target(pygame.sprite.Sprite):
             - duration of 3 s.
         """
 
-        end_pos = np.array([
-            np.random.random()*(
-                CONFIG['global']['window_width']-self.surf.get_width()
-            ),
-            np.random.random()*(
-                CONFIG['global']['window_height']-self.surf.get_height()
-            )
-        ])
+        end_pos, duration = sampleDestinations(
+            start_pos,
+            self.x_max, self.y_max,
+            self.config.saccade.min_duration,
+            self.config.saccade.max_duration,
+            rng=self.rng, block_size=1
+        )
+        end_pos, duration = end_pos[0], duration[0]
         distance = end_pos-start_pos
         amplitude = np.linalg.norm(distance)
-        duration = np.random.uniform(
-            CONFIG['saccade']['min_duration'],
-            CONFIG['saccade']['max_duration']
-        )
         velocity = distance / duration
 
         return EyeMovement(
@@ -89,27 +98,19 @@ class Target(pygame.sprite.Sprite):
 
         # Find an acceptable destination with respect
         # to the velocity constraints
-        velocity_condition_respected = False
-        while not velocity_condition_respected:
-            end_pos = np.array([
-                np.random.random()*(
-                    CONFIG['global']['window_width']-self.surf.get_width()
-                ),
-                np.random.random()*(
-                    CONFIG['global']['window_height']-self.surf.get_height()
-                )
-            ])
-            duration = np.random.uniform(
-                CONFIG['pursuit']['min_duration'],
-                CONFIG['pursuit']['max_duration']
-            )
-            distance = end_pos-start_pos
-            amplitude = np.linalg.norm(distance)
-            velocity = distance / duration
-            vel_norm = np.linalg.norm(velocity)
-            if (CONFIG['pursuit']['min_vel'] <= vel_norm) \
-                    and (CONFIG['pursuit']['max_vel'] >= vel_norm):
-                velocity_condition_respected = True
+        end_pos, duration = sampleDestinations(
+            start_pos,
+            self.x_max, self.y_max,
+            self.config.pursuit.min_duration,
+            self.config.pursuit.max_duration,
+            self.config.pursuit.min_vel,
+            self.config.pursuit.max_vel,
+            rng=self.rng
+        )
+        end_pos, duration = end_pos[0], duration[0]
+        distance = end_pos-start_pos
+        amplitude = np.linalg.norm(distance)
+        velocity = distance / duration
 
         return EyeMovement(
             'pursuit', start_pos, end_pos,
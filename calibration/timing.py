@@ -0,0 +1,86 @@
+
+from .arrays import emptyArray, growArray
+
+import numpy as np
+import time
+
+
+# Bin edges of the jitter histogram, in ms
+JITTER_BINS = [-np.inf, -5, -2, -1, -0.5, 0.5, 1, 2, 5, 10, 20, np.inf]
+
+
+class FrameTimer:
+    """
+    High-resolution record of frame boundaries.
+
+    The time of each frame is taken from time.perf_counter_ns
+    (or any other nanosecond clock), into a preallocated array
+    that grows by chunks if needed.
+    """
+
+    def __init__(self, fps, capacity=1000, now=time.perf_counter_ns) -> None:
+
+        self.fps = fps
+        self.now = now
+
+        # Frame marks, in ns
+        self.size = 0
+        self.chunk_size = capacity
+        self.marks = emptyArray(capacity, dtype=np.int64)
+
+    def mark(self):
+        """
+        Record a frame boundary.
+        """
+
+        if self.size == len(self.marks):
+            self.marks = growArray(self.marks, self.size, self.chunk_size)
+
+        self.marks[self.size] = self.now()
+        self.size += 1
+
+        return
+
+    def frameTimes(self):
+        """
+        Duration of each frame, in ms.
+        """
+        return np.diff(self.marks[:self.size]) / 1e6
+
+    def report(self):
+        """
+        Summarize frame timing quality against the target
+        frame rate. Jitter is the difference between each
+        frame time and the frame period, its histogram edges
+        are in ms (None stands for infinity).
+
+        A frame is late when it lasts more than 1.5 frame
+        periods, and each whole period it lasts beyond the
+        first one counts as a dropped frame.
+        """
+
+        frame_times = self.frameTimes()
+        period = 1000 / self.fps
+
+        if not len(frame_times):
+            return {'fps': self.fps, 'n_frames': 0}
+
+        late = frame_times > 1.5*period
+        dropped = np.round(frame_times[late]/period) - 1
+        counts, _ = np.histogram(frame_times-period, bins=JITTER_BINS)
+
+        return {
+            'fps': self.fps,
+            'n_frames': int(len(frame_times)),
+            'mean_frame_time': float(frame_times.mean()),
+            'std_frame_time': float(frame_times.std()),
+            'worst_frame_time': float(frame_times.max()),
+            'late_frames': int(late.sum()),
+            'dropped_frames': int(dropped.sum()),
+            'jitter_histogram': {
+                'edges': [
+                    None if np.isinf(edge) else edge for edge in JITTER_BINS
+                ],
+                'counts': counts.tolist()
+            }
+        }
@@ -0,0 +1,265 @@
+
+from .arrays import emptyArray, growArray
+
+import numpy as np
+import multiprocessing
+import threading
+import socket
+import struct
+import time
+
+
+# Gaze packet: tracker timestamp (in µs), x and y
+PACKET = struct.Struct('<qdd')
+
+
+class TrackerReceiver:
+    """
+    Eye-tracker gaze receiver, listening to UDP packets in a
+    separate process.
+
+    Each packet holds a tracker timestamp and a gaze position
+    (see PACKET). Samples are stored with their local receive
+    time into arrays that grow by chunks. The receiving process
+    has its own interpreter, so that the render loop and the
+    receive timestamps never wait for each other to release
+    the GIL. Samples are handed over when the receiver stops.
+    """
+
+    def __init__(self, host, port, capacity=300_000) -> None:
+
+        self.address = (host, port)
+        self.capacity = capacity
+
+        # Sample arrays, once received
+        self.size = 0
+        self.tracker_t = np.empty(0, dtype=np.int64)
+        self.local_t = np.empty(0, dtype=np.int64)
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+
+        self._process = None
+
+    def start(self):
+        """
+        Start receiving samples, once the socket is bound.
+        """
+
+        # Spawned rather than forked from a process running
+        # PyGame and background threads
+        context = multiprocessing.get_context('spawn')
+        self._connection, connection = context.Pipe()
+        self._stopping = context.Event()
+        self._process = context.Process(
+            target=_receive,
+            args=(self.address, self.capacity, connection, self._stopping),
+            daemon=True
+        )
+        self._process.start()
+
+        error = self._connection.recv()
+        if error is not None:
+            self._process.join()
+            self._process = None
+            raise error
+
+        return
+
+    def stop(self):
+        """
+        Stop receiving samples, if started, and collect them.
+        """
+
+        if self._process is None:
+            return
+
+        self._stopping.set()
+        self.tracker_t, self.local_t, self.x, self.y = \
+            self._connection.recv()
+        self.size = len(self.x)
+        self._process.join()
+        self._process = None
+        self._connection.close()
+
+        return
+
+    def synchronize(self, n_windows=20):
+        """
+        Estimate the tracker clock drift and offset with
+        respect to the local clock (time.perf_counter_ns).
+
+        Local receive times are the tracker times mapped to
+        the local clock, delayed by a positive transmission
+        latency. A first least-squares fit is refined on the
+        sample received the fastest in each of n_windows runs
+        of consecutive samples, which follow the lower envelope
+        of the delays even through bursts of late packets.
+
+        Returns the (drift, offset) such that local ns =
+        drift * tracker µs + offset.
+        """
+
+        tracker_t = self.tracker_t[:self.size].astype(np.float64)
+        local_t = self.local_t[:self.size].astype(np.float64)
+
+        # Work relative to the first sample for precision
+        tracker_0, local_0 = tracker_t[0], local_t[0]
+        tracker_t -= tracker_0
+        local_t -= local_0
+
+        drift, offset = np.polyfit(tracker_t, local_t, 1)
+        residuals = local_t - (drift*tracker_t + offset)
+        fast = [
+            window[np.argmin(residuals[window])]
+            for window in np.array_split(
+                np.arange(self.size), min(n_windows, self.size)
+            )
+        ]
+        drift, offset = np.polyfit(tracker_t[fast], local_t[fast], 1)
+
+        return drift, local_0 + offset - drift*tracker_0
+
+    def getSamples(self, origin_ns):
+        """
+        Return the gaze samples with timestamps t in ms on the
+        session clock, whose origin is origin_ns on the local
+        clock, along with the estimated clock synchronization.
+        """
+
+        if not self.size:
+            return {
+                't': np.empty(0), 'x': np.empty(0), 'y': np.empty(0),
+                'drift': None, 'offset': None
+            }
+
+        drift, offset = self.synchronize()
+        local_t = drift*self.tracker_t[:self.size] + offset
+
+        return {
+            't': (local_t - origin_ns) / 1e6,
+            'x': self.x[:self.size],
+            'y': self.y[:self.size],
+            'drift': drift,
+            'offset': offset
+        }
+
+
+def _receive(address, capacity, connection, stopping):
+    """
+    Receiver process loop, until stopping is set. Reports
+    whether the socket could be bound, then sends the samples
+    over the connection.
+    """
+
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(address)
+        sock.settimeout(0.1)
+    except OSError as error:
+        connection.send(error)
+        return
+    connection.send(None)
+
+    size = 0
+    tracker_t = emptyArray(capacity, dtype=np.int64)
+    local_t = emptyArray(capacity, dtype=np.int64)
+    x = emptyArray(capacity)
+    y = emptyArray(capacity)
+
+    while not stopping.is_set():
+
+        try:
+            packet = sock.recv(PACKET.size)
+        except socket.timeout:
+            continue
+        received = time.perf_counter_ns()
+
+        if len(packet) != PACKET.size:
+            continue
+
+        if size == len(x):
+            tracker_t, local_t, x, y = (
+                growArray(array, size, capacity)
+                for array in (tracker_t, local_t, x, y)
+            )
+
+        tracker_t[size], x[size], y[size] = PACKET.unpack(packet)
+        local_t[size] = received
+        size += 1
+
+    sock.close()
+    connection.send(tuple(
+        array[:size].copy() for array in (tracker_t, local_t, x, y)
+    ))
+    connection.close()
+
+
+class MockTracker:
+    """
+    Local eye-tracker sending gaze packets over UDP, for
+    development and testing.
+
+    Its clock runs at (1 + drift) times the local clock, with
+    an offset in µs, and gaze positions come from the gaze
+    function of the local time in s (a fixed point by default).
+    """
+
+    def __init__(
+        self, host, port, rate=1000,
+        drift=0., offset=0, gaze=lambda t: (0., 0.)
+    ) -> None:
+
+        self.address = (host, port)
+        self.rate = rate
+        self.drift = drift
+        self.offset = offset
+        self.gaze = gaze
+        self.n_sent = 0
+
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """
+        Start sending packets.
+        """
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._running = True
+        self._thread = threading.Thread(target=self._send, daemon=True)
+        self._thread.start()
+
+        return
+
+    def stop(self):
+        """
+        Stop sending packets.
+        """
+
+        self._running = False
+        self._thread.join()
+        self._socket.close()
+
+        return
+
+    def _send(self):
+        """
+        Sender thread loop. Packets that are due are sent in
+        bursts, so that high rates do not depend on the sleep
+        resolution.
+        """
+
+        start = time.perf_counter_ns()
+        while self._running:
+
+            due = (time.perf_counter_ns()-start) * self.rate // 10**9
+            while self.n_sent <= due:
+                local_t = start + self.n_sent * 10**9 // self.rate
+                tracker_t = int(local_t/1000*(1+self.drift)) + self.offset
+                self._socket.sendto(
+                    PACKET.pack(tracker_t, *self.gaze(local_t/1e9)),
+                    self.address
+                )
+                self.n_sent += 1
+
+            time.sleep(0.0005)
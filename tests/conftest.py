@@ -0,0 +1,25 @@
+from calibration.calibrations import TernaryCalibration
+from calibration import CONFIG
+
+import numpy as np
+import pytest
+
+
+# Sessions of 12 s
+CONFIG_SHORT = CONFIG.replace({'global': {'exp_duration': 0.2}})
+
+
+@pytest.fixture
+def session():
+    """
+    Factory of headless ternary sessions, short unless given
+    another config.
+    """
+
+    def make(fps=None, seed=0, config=CONFIG_SHORT, **kwargs):
+        return TernaryCalibration(
+            None, headless=True, rng=np.random.default_rng(seed),
+            config=config, fps=fps, **kwargs
+        )
+
+    return make
@@ -0,0 +1,61 @@
+
+from calibration.buffer import SampleBuffer
+from calibration.storage import SessionWriter, loadSession
+from calibration.clock import VirtualClock
+
+import numpy as np
+import pytest
+
+
+# Measured refresh rates are fractional
+FPS = 59.94
+
+
+def test_headless_session_at_fractional_rate(session):
+
+    calibration = session(fps=FPS)
+
+    samples = calibration.getSamples()
+    assert len(samples['t']) == len(calibration.schedule)
+    assert np.allclose(np.diff(samples['t']), 1000/FPS)
+
+
+def test_streamed_session_at_fractional_rate(session, tmp_path):
+
+    calibration = session(
+        fps=FPS, sink=SessionWriter(str(tmp_path / 'session'), {})
+    )
+
+    session = loadSession(str(tmp_path / 'session'))
+    assert len(session['t']) == len(calibration.schedule)
+
+
+def test_buffer_grows_by_fractional_chunks():
+
+    buffer = SampleBuffer(FPS, chunk_size=FPS/2)
+    for i in range(200):
+        buffer.append(i, i, i)
+
+    assert np.array_equal(buffer.view()['t'], np.arange(200))
+
+
+@pytest.mark.parametrize('fps', [60, 100, 144])
+def test_headless_timing_is_ideal(session, fps):
+
+    calibration = session(fps=fps)
+
+    samples = calibration.getSamples()
+    assert np.array_equal(
+        samples['t'], np.arange(len(samples['t'])) * (1000/fps)
+    )
+    assert not np.any(samples['delay'])
+
+
+def test_virtual_clock_does_not_drift():
+
+    clock = VirtualClock()
+    for _ in range(144*60):
+        clock.tick(144)
+
+    assert clock.elapsed == 60_000
+    assert clock.time_ns() == 60_000_000_000
@@ -0,0 +1,52 @@
+from calibration.encoding import encodeTrace, decodeTrace
+
+import numpy as np
+import pytest
+
+
+COLUMNS = ('t', 'x', 'y', 'delay')
+
+
+def _trace(calibration):
+    samples = calibration.getSamples()
+    data = {column: np.array(samples[column]) for column in COLUMNS}
+    return data, calibration.getStimulusMovements().table
+
+
+def _assertRoundTrip(data, movements, fps):
+    events = encodeTrace(data, movements, fps)
+    decoded = decodeTrace(events, movements)
+    for column in COLUMNS:
+        assert np.array_equal(decoded[column], data[column]), column
+    return events
+
+
+@pytest.mark.parametrize('fps', [60, 100, 144])
+def test_headless_round_trip(session, fps):
+
+    data, movements = _trace(session(fps=fps))
+    events = _assertRoundTrip(data, movements, fps)
+
+    # On the frame grid, with pursuits recomputed and
+    # constant delays
+    assert 'frame_runs' in events and 't' not in events
+    assert len(events['pursuits'])
+    assert 'delay_changes' in events
+
+
+@pytest.mark.parametrize('fps', [60, 100, 144])
+def test_real_clock_round_trip(session, fps):
+
+    data, movements = _trace(session(fps=fps))
+    rng = np.random.default_rng(1)
+
+    # Delays as recorded from whole ns flip timestamps
+    offsets = rng.integers(0, 3_000_000, len(data['t']))
+    data['delay'] = (np.rint(data['t']*1e6) + offsets)/1e6 - data['t']
+    events = _assertRoundTrip(data, movements, fps)
+    assert 'delay_ns' in events
+
+    # Delays that are not whole ns are stored as they are
+    data['delay'] = rng.uniform(0, 3, len(data['t']))
+    events = _assertRoundTrip(data, movements, fps)
+    assert 'delay' in events
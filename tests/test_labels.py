@@ -0,0 +1,40 @@
+from calibration.labels import MovementIndex
+
+import numpy as np
+
+
+def test_labels_follow_played_movements(session):
+
+    calibration = session()
+    queue = calibration.getStimulusMovements()
+
+    _, ids = MovementIndex.fromQueue(queue).label(
+        calibration.getSamples()['t']
+    )
+    expected = np.repeat(np.arange(len(queue)), queue.table['sample_count'])
+    assert np.array_equal(ids, expected)
+
+
+def test_unplayed_movements_follow_last_played(session):
+
+    calibration = session()
+    queue = calibration.getStimulusMovements()
+    recorded = queue.recordedOnsets()
+
+    # Early exit: the last movements were not played
+    queue._onsets[len(queue)-3:len(queue)] = np.nan
+    onsets = queue.playedOnsets()
+
+    assert np.array_equal(onsets[:-3], recorded[:-3])
+    nominal = queue.onsets()*1000
+    assert np.allclose(
+        onsets[-3:], recorded[-4] + nominal[-3:] - nominal[-4]
+    )
+
+    # Played samples keep their movement
+    _, ids = MovementIndex.fromQueue(queue).label(
+        calibration.getSamples()['t']
+    )
+    expected = np.repeat(np.arange(len(queue)), queue.table['sample_count'])
+    played = expected < len(queue)-3
+    assert np.array_equal(ids[played], expected[played])
@@ -0,0 +1,70 @@
+from calibration.sampling import sampleDestinations
+
+import numpy as np
+import pytest
+
+
+WIDTH, HEIGHT = 1200, 700
+
+
+def _sample(start_pos, min_vel, max_vel, n=2000):
+    """
+    Destinations from n copies of start_pos, with a single
+    candidate per position so that most of them come from the
+    feasible region sampling.
+    """
+
+    return sampleDestinations(
+        np.tile(start_pos, (n, 1)), WIDTH, HEIGHT, 1, 2,
+        min_vel, max_vel, rng=np.random.default_rng(0),
+        block_size=1, max_rounds=1
+    )
+
+
+def _checkConstraints(start_pos, end_pos, durations, min_vel, max_vel):
+    assert np.all((end_pos >= 0) & (end_pos <= (WIDTH, HEIGHT)))
+    speeds = np.linalg.norm(end_pos - start_pos, axis=1) / durations
+    assert np.all(speeds >= min_vel*(1-1e-9))
+    assert np.all(speeds <= max_vel*(1+1e-9))
+    assert np.all((durations >= 1) & (durations <= 2))
+
+
+def test_tight_velocity_bounds_in_all_directions():
+
+    start_pos = np.array([WIDTH/2, HEIGHT/2])
+    end_pos, durations = _sample(start_pos, 200, 201)
+    _checkConstraints(start_pos, end_pos, durations, 200, 201)
+
+    # Every quadrant is reached about as often
+    dx, dy = (end_pos - start_pos).T
+    quadrants = np.bincount(2*(dx > 0) + (dy > 0), minlength=4)
+    assert np.all(quadrants > 0.2*len(end_pos))
+
+
+def test_tight_velocity_bounds_from_a_corner():
+
+    start_pos = np.array([0., 0.])
+    end_pos, durations = _sample(start_pos, 500, 501)
+    _checkConstraints(start_pos, end_pos, durations, 500, 501)
+
+    # Directions spread over the quadrant inside the area
+    angles = np.arctan2(*(end_pos - start_pos).T[::-1])
+    assert angles.min() < 0.2 and angles.max() > np.pi/2 - 0.2
+
+
+def test_velocity_bounds_only_met_toward_the_far_corner():
+
+    # The shortest admissible distance is just under the
+    # diagonal of the area
+    start_pos = np.array([0., 0.])
+    min_vel = 0.99*np.hypot(WIDTH, HEIGHT)
+    end_pos, durations = _sample(start_pos, min_vel, np.inf, n=200)
+    _checkConstraints(start_pos, end_pos, durations, min_vel, np.inf)
+
+
+def test_unreachable_velocity_bounds():
+
+    # Even the farthest corner is closer than the shortest
+    # admissible distance
+    with pytest.raises(ValueError):
+        _sample(np.array([0., 0.]), 2000, 3000, n=10)
@@ -0,0 +1,33 @@
+from calibration.schedule import frameBoundaries
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('fps', [59.94, 100, 144])
+def test_played_onsets_stay_within_a_frame(session, fps):
+
+    queue = session(fps=fps).getStimulusMovements()
+
+    drift = queue.recordedOnsets() - queue.onsets()*1000
+    assert np.all((drift >= -1e-6) & (drift < 1000/fps))
+
+
+@pytest.mark.parametrize('fps', [59.94, 100, 144])
+def test_queue_positions_match_the_trace(session, fps):
+
+    calibration = session(fps=fps)
+    samples = calibration.getSamples()
+    target = calibration.target
+
+    # Evaluated at the session timestamps, without replaying
+    x, y = calibration.getStimulusMovements().position(samples['t']/1000)
+    assert np.allclose(x + target.x_offset, samples['x'], rtol=0, atol=1e-6)
+    assert np.allclose(target.y_offset - y, samples['y'], rtol=0, atol=1e-6)
+
+
+def test_movements_shorter_than_a_frame():
+
+    boundaries = frameBoundaries(np.array([0.001, 0.001, 1.]), 60)
+
+    assert np.array_equal(boundaries, [0, 1, 2, 61])
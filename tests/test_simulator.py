@@ -0,0 +1,42 @@
+from calibration.simulator import simulateGaze
+from calibration import CONFIG
+
+import numpy as np
+
+
+def test_gaze_follows_played_onsets(session):
+
+    # Without noise nor blinks, at a fractional rate where
+    # frame rounding adds up over the session
+    config = CONFIG.replace({
+        'global': {'exp_duration': 1},
+        'simulator': {'noise': 0, 'blink_rate': 0}
+    })
+    calibration = session(fps=59.94, seed=3, config=config)
+    gaze = simulateGaze(calibration, rng=np.random.default_rng(0))
+    samples = calibration.getSamples()
+    queue = calibration.getStimulusMovements()
+
+    assert gaze['t'][-1] >= samples['t'][-1]
+
+    # Time from the target reaching a new position to the
+    # gaze reaching it, which includes the saccade latency
+    reaction = []
+    for i, movement in enumerate(queue):
+        if movement.type == 'pursuit' \
+                or np.allclose(movement.start_pos, movement.end_pos):
+            continue
+        start = queue.table['sample_offset'][i]
+        stop = start + queue.table['sample_count'][i]
+        x, y = samples['x'][stop-1], samples['y'][stop-1]
+        shown = samples['t'][start:stop][
+            (samples['x'][start:stop] == x) & (samples['y'][start:stop] == y)
+        ][0]
+        reached = gaze['t'][
+            (gaze['t'] >= samples['t'][start])
+            & (np.hypot(gaze['x']-x, gaze['y']-y) < 1)
+        ][0]
+        reaction.append(reached - shown)
+
+    assert len(reaction)
+    assert min(reaction) > 100
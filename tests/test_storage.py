@@ -0,0 +1,86 @@
+from calibration.storage import recoverSession, loadSession
+
+import numpy as np
+import subprocess
+import textwrap
+import pytest
+import json
+import sys
+import os
+
+
+COLUMNS = ('t', 'x', 'y', 'delay')
+
+# Writes a session to a SessionWriter then exits abruptly,
+# once the samples reached the disk
+CRASH = textwrap.dedent('''
+    import numpy as np, json, os, sys, time
+    from calibration.storage import SessionWriter
+
+    path, source = sys.argv[1:3]
+    with open(source + '.json') as f:
+        meta = json.load(f)
+    data = np.load(source + '.npz')
+
+    writer = SessionWriter(path, meta)
+    for record in data['movements']:
+        writer.writeMovement(record)
+    writer.writeSamples(*(data[column] for column in 'txy'), data['delay'])
+
+    size = 8 * len(data['t'])
+    while os.path.getsize(os.path.join(path, 'delay.bin')) < size:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    os._exit(1)
+''')
+
+
+@pytest.mark.parametrize('encoding', ['columns', 'events'])
+def test_recover_interrupted_session(session, tmp_path, encoding):
+
+    calibration = session()
+    samples = calibration.getSamples()
+    movements = calibration.getStimulusMovements().toArray()
+    meta = calibration.config.toDict() | {
+        'type': calibration.type, 'fps': calibration.fps
+    }
+    meta['export']['encoding'] = encoding
+
+    # Interrupted in the middle of the fourth movement, whose
+    # record was written before all its samples
+    n_samples = movements['sample_offset'][3] \
+        + movements['sample_count'][3] // 2
+    source = str(tmp_path / 'source')
+    np.savez(
+        source, movements=movements[:4],
+        **{column: samples[column][:n_samples] for column in COLUMNS}
+    )
+    with open(source + '.json', 'w') as f:
+        json.dump(meta, f)
+
+    path = str(tmp_path / 'session')
+    process = subprocess.run(
+        [sys.executable, '-c', CRASH, path, source],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    assert process.returncode == 1
+    assert os.path.exists(os.path.join(path, 'stream.json'))
+
+    recoverSession(path)
+    recovered = loadSession(path)
+
+    # Raw files replaced with the saved format
+    saved = 'events.npz' if encoding == 'events' else 't.npy'
+    assert os.path.exists(os.path.join(path, saved))
+    assert not any(name.endswith('.bin') for name in os.listdir(path))
+    assert not os.path.exists(os.path.join(path, 'stream.json'))
+    assert recovered['meta']['recovered']
+    for column in COLUMNS:
+        assert np.array_equal(
+            recovered[column], samples[column][:n_samples]
+        ), column
+
+    # The cut movement keeps the samples that were written
+    expected = movements[:4].copy()
+    expected['sample_count'][3] = n_samples - expected['sample_offset'][3]
+    assert np.array_equal(recovered['movements'], expected)
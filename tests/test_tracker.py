@@ -0,0 +1,115 @@
+from calibration.tracker import TrackerReceiver, MockTracker
+from calibration.calibrations import TernaryCalibration
+from calibration.presentation import openWindow
+from calibration import CONFIG
+
+import numpy as np
+import subprocess
+import pygame
+import textwrap
+import socket
+import time
+import sys
+import os
+
+
+HOST = '127.0.0.1'
+
+# Tracker clock running 1% fast, from an arbitrary origin
+DRIFT = 0.01
+OFFSET = 123_456_789
+
+
+# Sends gaze packets at 2 kHz from its own process, until
+# terminated
+MOCK = textwrap.dedent(f'''
+    import sys, time
+    from calibration.tracker import MockTracker
+
+    tracker = MockTracker(
+        {HOST!r}, int(sys.argv[1]), rate=2000,
+        drift={DRIFT}, offset={OFFSET}
+    )
+    tracker.start()
+    time.sleep(60)
+''')
+
+
+def _freePort():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def test_synchronize_with_mock_tracker():
+
+    port = _freePort()
+
+    # Small capacity, for the arrays to grow while receiving
+    receiver = TrackerReceiver(HOST, port, capacity=256)
+    tracker = MockTracker(HOST, port, drift=DRIFT, offset=OFFSET)
+
+    receiver.start()
+    tracker.start()
+    time.sleep(1)
+    tracker.stop()
+    time.sleep(0.05)
+    receiver.stop()
+
+    assert receiver.size == tracker.n_sent
+
+    # Local ns per tracker µs, within 200 ppm over 1 s
+    drift, offset = receiver.synchronize()
+    assert abs(drift - 1000/(1+DRIFT)) < 0.2
+
+    # Tracker times mapped back to their send times, within 1 ms
+    tracker_t = receiver.tracker_t[:receiver.size]
+    sent = (tracker_t - OFFSET) * 1000/(1+DRIFT)
+    assert np.abs(drift*tracker_t + offset - sent).max() < 1e6
+
+    # Samples on the session clock
+    origin_ns = receiver.local_t[0]
+    samples = receiver.getSamples(origin_ns)
+    assert samples['drift'] == drift
+    assert np.all(np.diff(samples['t']) > 0)
+    assert abs(samples['t'][0]) < 1
+
+
+def test_session_with_tracker(monkeypatch):
+
+    monkeypatch.setenv('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+
+    port = _freePort()
+    mock = subprocess.Popen(
+        [sys.executable, '-c', MOCK, str(port)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+
+    try:
+        config = CONFIG.replace({'global': {'exp_duration': 0.05}})
+        screen, vsync = openWindow(config)
+        receiver = TrackerReceiver(HOST, port)
+        calibration = TernaryCalibration(
+            screen, rng=np.random.default_rng(0), config=config,
+            fps=100, vsync=vsync, tracker=receiver
+        )
+    finally:
+        mock.terminate()
+        mock.wait()
+        pygame.display.quit()
+
+    # Frames are not held up by the receiver
+    delays = calibration.getSamples()['delay']
+    report = calibration.getFrameTimingReport()['presentation']
+    assert report['skipped_frames'] == 0
+    assert np.percentile(delays, 99) < 2
+
+    # Packets are timestamped on receipt, and mapped back to
+    # their send times without bias
+    assert receiver.size > 2000
+    tracker_t = receiver.tracker_t[:receiver.size]
+    sent = (tracker_t - OFFSET) * 1000/(1+DRIFT)
+    assert np.median(receiver.local_t[:receiver.size] - sent) < 1e6
+    drift, offset = receiver.synchronize()
+    assert abs(np.median(drift*tracker_t + offset - sent)) < 1e6